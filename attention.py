@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+
+# --- Atenção por produto escalar escalonado ---
+# Duas implementações com o mesmo resultado:
+# - naive_attention materializa a matriz de scores inteira (memória O(n²));
+# - tiled_attention percorre as chaves em blocos com softmax "online"
+#   (máximo e soma acumulados), então a memória fica em O(n·d).
+# Ambas aceitam lotes: Q, K, V com forma (..., n, d).
+
+def softmax(x, axis=-1):
+    # Subtrair o máximo evita overflow em exp() sem mudar o resultado
+    e = x - x.max(axis=axis, keepdims=True)
+    np.exp(e, out=e)
+    e /= e.sum(axis=axis, keepdims=True)
+    return e
+
+
+def causal_mask(n_queries, n_keys, query_offset=0, key_offset=0):
+    # True onde a query NÃO pode ver a chave (chave no futuro)
+    q = np.arange(query_offset, query_offset + n_queries)[:, None]
+    k = np.arange(key_offset, key_offset + n_keys)[None, :]
+    return k > q
+
+
+def naive_attention(Q, K, V, causal=False):
+    scores = Q @ np.swapaxes(K, -1, -2)
+    scores *= 1 / math.sqrt(Q.shape[-1])
+    if causal:
+        scores = np.where(causal_mask(Q.shape[-2], K.shape[-2]), -np.inf, scores)
+    return softmax(scores) @ V
+
+
+def tiled_attention(Q, K, V, causal=False, block_size=512):
+    n_q, n_k, d = Q.shape[-2], K.shape[-2], Q.shape[-1]
+    scale = 1 / math.sqrt(d)
+    dtype = np.result_type(Q, K, V)
+    out = np.empty(Q.shape[:-1] + (V.shape[-1],), dtype=dtype)
+
+    for q_start in range(0, n_q, block_size):
+        q_end = min(q_start + block_size, n_q)
+        q_block = Q[..., q_start:q_end, :] * scale
+        running_max = np.full(q_block.shape[:-1] + (1,), -np.inf, dtype=dtype)
+        running_sum = np.zeros(q_block.shape[:-1] + (1,), dtype=dtype)
+        acc = np.zeros(q_block.shape[:-1] + (V.shape[-1],), dtype=dtype)
+
+        # Com máscara causal, blocos de chaves totalmente no futuro são pulados
+        k_stop = min(n_k, q_end) if causal else n_k
+        for k_start in range(0, k_stop, block_size):
+            k_end = min(k_start + block_size, k_stop)
+            scores = q_block @ np.swapaxes(K[..., k_start:k_end, :], -1, -2)
+            if causal:
+                mask = causal_mask(q_end - q_start, k_end - k_start, q_start, k_start)
+                scores = np.where(mask, -np.inf, scores)
+
+            block_max = np.maximum(running_max, scores.max(axis=-1, keepdims=True))
+            correction = np.exp(running_max - block_max)
+            weights = np.exp(scores - block_max)
+            running_sum = running_sum * correction + weights.sum(axis=-1, keepdims=True)
+            acc = acc * correction + weights @ V[..., k_start:k_end, :]
+            running_max = block_max
+
+        out[..., q_start:q_end, :] = acc / running_sum
+    return out
+
+
+def naive_memory_bytes(n, d, batch=1, itemsize=8):
+    # Scores + cópia da softmax (n×n cada) mais Q, K, V e saída
+    return batch * (2 * n * n + 4 * n * d) * itemsize
+
+
+def tiled_memory_bytes(n, d, batch=1, block_size=512, itemsize=8):
+    return batch * (2 * block_size * block_size + 4 * n * d + 3 * block_size * d) * itemsize
+
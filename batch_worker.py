@@ -0,0 +1,74 @@
+import queue
+import threading
+import time
+
+# --- Fila em processo + worker em segundo plano ---
+# Usado pelo feedback e pela telemetria: o script do Streamlit só enfileira
+# e volta; uma thread daemon junta lotes (até max_batch itens ou flush_interval
+# segundos) e chama write(lote). No close(), o que sobrou na fila é gravado
+# num último lote.
+
+class BatchWorker:
+    def __init__(self, write, name, max_batch, flush_interval, max_pending=0):
+        self.write = write
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        # Nunca bloqueia; devolve False se a fila limitada estiver cheia
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def wait(self, seconds):
+        # Pausa entre tentativas que termina na hora se close() for chamado
+        self._stop.wait(seconds)
+
+    def _collect_batch(self):
+        # Espera o primeiro item e depois junta outros até o tamanho máximo
+        # do lote ou até o prazo de flush expirar.
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain_nowait(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self.write(batch)
+        batch = self._drain_nowait()
+        if batch:
+            self.write(batch)
+
+    def close(self, timeout=10.0):
+        self._stop.set()
+        self._thread.join(timeout)
@@ -0,0 +1,61 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attention import naive_attention, naive_memory_bytes, tiled_attention
+
+# --- Atenção ingênua x em blocos por comprimento de sequência ---
+# Antes de medir, confere que os dois caminhos dão o mesmo resultado
+# (com e sem máscara causal); o ingênuo é pulado acima do limite de memória.
+# O pico vem do tracemalloc, que é global ao processo: por isso a medição
+# fica aqui, num processo só para ela, e não no app.
+
+
+def profile_attention(fn, Q, K, V, causal=False):
+    # Tempo de parede e pico de memória alocada (NumPy reporta ao tracemalloc)
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        out = fn(Q, K, V, causal=causal)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de atenção: O(n²) x blocos com softmax online")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[256, 1024, 2048, 4096, 8192, 16384])
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--naive-limit-mb", type=float, default=1024)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for causal in (False, True):
+        for n in (1, 33, 700):
+            Q, K, V = (rng.standard_normal((2, n, args.dim)) for _ in range(3))
+            diff = np.abs(naive_attention(Q, K, V, causal) - tiled_attention(Q, K, V, causal, block_size=128)).max()
+            if diff > 1e-10:
+                sys.exit(f"FALHA: caminhos divergem (n={n}, causal={causal}, diff={diff:.2e})")
+
+    for n in args.lengths:
+        Q, K, V = (rng.standard_normal((n, args.dim), dtype=np.float32) for _ in range(3))
+        linha = {"n": n, "d": args.dim}
+        if naive_memory_bytes(n, args.dim, itemsize=4) <= args.naive_limit_mb * 2**20:
+            _, segundos, pico = profile_attention(naive_attention, Q, K, V)
+            linha.update(naive_s=round(segundos, 4), naive_peak_mb=round(pico / 2**20, 1))
+        _, segundos, pico = profile_attention(tiled_attention, Q, K, V)
+        linha.update(tiled_s=round(segundos, 4), tiled_peak_mb=round(pico / 2**20, 1))
+        print(json.dumps(linha), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+
+from matplotlib._pylab_helpers import Gcf
+from streamlit.testing.v1 import AppTest
+
+# --- Regressão de vazamento de figuras na Fase 4 ---
+# Executa muitos reruns da fase com parâmetros variados e verifica que o
+# registro global do pyplot continua vazio e que o RSS não cresce.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "transformer_game.py")
+sys.path.insert(0, ROOT)
+
+from game_state import GameState
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica vazamento de figuras/memória na Fase 4")
+    parser.add_argument("--reruns", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=20.0)
+    args = parser.parse_args()
+
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["game"] = GameState("phase4")
+    at.run()
+
+    comprimentos = [50, 100, 500, 1_000, 5_000]
+    respostas = at.radio(key="fase4_radio").options
+    baseline = None
+    for i in range(args.reruns):
+        at.select_slider(key="fase4_comprimento").set_value(comprimentos[i % len(comprimentos)])
+        at.radio(key="fase4_radio").set_value(respostas[i % len(respostas)])
+        at.run()
+        if at.exception:
+            sys.exit(f"Erro no rerun {i}: {at.exception}")
+        if i + 1 == args.warmup:
+            baseline = rss_bytes()
+
+    figuras = len(Gcf.get_all_fig_managers())
+    crescimento_mb = (rss_bytes() - baseline) / 2**20
+    print(f"reruns={args.reruns} figuras_pyplot={figuras} crescimento_rss_mb={crescimento_mb:.1f}")
+
+    if figuras:
+        sys.exit(f"FALHA: {figuras} figura(s) registradas no pyplot")
+    if crescimento_mb > args.max_rss_growth_mb:
+        sys.exit(f"FALHA: RSS cresceu {crescimento_mb:.1f} MB após o aquecimento")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import streamlit.testing.v1.local_script_runner as local_script_runner
+from streamlit.testing.v1 import AppTest
+
+# --- Rerun completo x rerun do fragmento, por interação ---
+# Para cada fase, altera o widget interativo e mede o tempo do rerun e o
+# tamanho das mensagens enviadas ao navegador (soma dos ForwardMsg, o que
+# trafega no websocket). "antes" força um rerun do script inteiro, como
+# acontecia sem fragmentos; "depois" reexecuta só o fragmento do widget.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from game_state import GameState
+
+INTERACOES = [
+    ("phase1", "selectbox", "fase1_0"),
+    ("phase2", "slider", "fase2_q"),
+    ("phase3", "selectbox", "p3_query"),
+    ("phase4", "select_slider", "fase4_comprimento"),
+    ("phase5", "radio", "fase5_escolha"),
+]
+
+_estado = {"fragmento": None, "mensagens": []}
+_RerunData = local_script_runner.RerunData
+_run = local_script_runner.LocalScriptRunner.run
+
+
+def _rerun_data(**kwargs):
+    if _estado["fragmento"]:
+        kwargs.update(fragment_id_queue=[_estado["fragmento"]], is_fragment_scoped_rerun=True)
+    return _RerunData(**kwargs)
+
+
+def _run_capturando(self, *args, **kwargs):
+    tree = _run(self, *args, **kwargs)
+    _estado["mensagens"] = list(self.forward_msgs())
+    return tree
+
+
+local_script_runner.RerunData = _rerun_data
+local_script_runner.LocalScriptRunner.run = _run_capturando
+
+
+def _widget(at, tipo, key):
+    return getattr(at, tipo)(key=key)
+
+
+def _proximo_valor(widget, i):
+    if hasattr(widget, "options") and widget.options:
+        return widget.options[i % len(widget.options)]
+    return widget.min + (i * 7) % (widget.max - widget.min + 1)
+
+
+def _rerun(at, fragmento):
+    _estado["fragmento"] = fragmento
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    _estado["fragmento"] = None
+    if at.exception:
+        raise RuntimeError(at.exception)
+    return elapsed, sum(m.ByteSize() for m in _estado["mensagens"])
+
+
+def medir(fase, tipo, key, repeticoes):
+    at = AppTest.from_file(os.path.join(ROOT, "transformer_game.py"), default_timeout=60)
+    at.session_state["game"] = GameState(fase)
+    at.run()
+    fragmento = next(
+        m.delta.fragment_id for m in _estado["mensagens"]
+        if m.HasField("delta") and key in str(m.delta.new_element)
+    )
+
+    # Aquecimento: percorre os valores uma vez para popular caches (gráficos etc.)
+    for i in range(repeticoes + 1):
+        widget = _widget(at, tipo, key)
+        widget.set_value(_proximo_valor(widget, i))
+        _rerun(at, None)
+
+    medidas = {"antes": ([], []), "depois": ([], [])}
+    for i in range(repeticoes):
+        for cenario, frag in (("antes", None), ("depois", fragmento)):
+            widget = _widget(at, tipo, key)
+            widget.set_value(_proximo_valor(widget, i + (cenario == "depois")))
+            elapsed, tamanho = _rerun(at, frag)
+            medidas[cenario][0].append(elapsed)
+            medidas[cenario][1].append(tamanho)
+            if frag:
+                # Restaura a árvore completa do AppTest (não medido)
+                _rerun(at, None)
+
+    return {
+        "fase": fase,
+        "widget": key,
+        **{
+            f"{cenario}_{nome}": round(statistics.median(valores), 4 if nome == "rerun_s" else 0)
+            for cenario, (tempos, tamanhos) in medidas.items()
+            for nome, valores in (("rerun_s", tempos), ("delta_bytes", tamanhos))
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de rerun e bytes de delta: script inteiro x fragmento")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    resultados = [medir(fase, tipo, key, args.repeticoes) for fase, tipo, key in INTERACOES]
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decoding import TinyDecoder, generate
+
+# --- Geração autoregressiva com e sem KV-cache ---
+# Sem cache o tempo por token cresce com o comprimento (total quadrático);
+# com cache fica praticamente constante (total linear).
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de decodificação: sem cache x KV-cache")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[64, 128, 256, 512, 1024])
+    parser.add_argument("--d-model", type=int, default=64)
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--heads", type=int, default=4)
+    args = parser.parse_args()
+
+    modelo = TinyDecoder(d_model=args.d_model, n_heads=args.heads, n_layers=args.layers)
+    prompt = list(range(1, 9))
+    for n in args.lengths:
+        tokens_sem, tempos_sem, _ = generate(modelo, prompt, n, use_cache=False)
+        tokens_com, tempos_com, cache = generate(modelo, prompt, n, use_cache=True)
+        if tokens_sem != tokens_com:
+            sys.exit(f"FALHA: saídas diferentes com e sem cache (n={n})")
+        print(json.dumps({
+            "tokens": n,
+            "no_cache_total_s": round(sum(tempos_sem), 4),
+            "no_cache_last_step_ms": round(tempos_sem[-1] * 1000, 3),
+            "kv_cache_total_s": round(sum(tempos_com), 4),
+            "kv_cache_last_step_ms": round(tempos_com[-1] * 1000, 3),
+            "speedup": round(sum(tempos_sem) / sum(tempos_com), 1),
+            "kv_cache_bytes_per_token": cache.bytes_per_token(),
+        }), flush=True)
+
+
+if __name__ == "__main__":
+    main()
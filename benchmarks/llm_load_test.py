@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_client
+from llm_cache import make_key
+from llm_executor import LLMJob
+from mock_llm_server import start_mock_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --- Teste de carga do cliente da LLM contra o mock com cota ---
+# Compara chamadas diretas (como era antes) com o caminho que o app usa:
+# transformer_game.fetch_llm_reply, com o token bucket, o retry e o
+# single-flight configurados por LLM_RATE_* no próprio app. Só o cache em
+# disco fica de fora, para que toda pergunta chegue ao endpoint.
+
+PERGUNTAS = [
+    "o que é dₖ?",
+    "por que dividir por √dₖ?",
+    "o que é multi-head attention?",
+    "para que serve o positional encoding?",
+]
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_scenario(name, call, sessions, concurrency, state):
+    state.requests = state.rejected = 0
+    latencies = []
+    failures = 0
+
+    def one_session(i):
+        question = random.choice(PERGUNTAS)
+        start = time.perf_counter()
+        try:
+            call(question)
+            return time.perf_counter() - start, False
+        except (llm_client.LLMError, requests.RequestException):
+            return time.perf_counter() - start, True
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, failed in pool.map(one_session, range(sessions)):
+            latencies.append(latency)
+            failures += failed
+    elapsed = time.perf_counter() - start
+
+    return {
+        "scenario": name,
+        "sessions": sessions,
+        "upstream_requests": state.requests,
+        "upstream_429": state.rejected,
+        "upstream_429_rate": state.rejected / state.requests if state.requests else 0.0,
+        "user_failures": failures,
+        "user_failure_rate": failures / sessions,
+        "p50_latency_s": round(percentile(latencies, 50), 3),
+        "p95_latency_s": round(percentile(latencies, 95), 3),
+        "wall_time_s": round(elapsed, 3),
+    }
+
+
+def load_app():
+    # Importa o script do app em "bare mode" (sem servidor do Streamlit), com
+    # feedback e telemetria num diretório temporário
+    import logging
+
+    logging.disable(logging.WARNING)
+    tmp = tempfile.mkdtemp()
+    os.environ["FEEDBACK_LOG_PATH"] = os.path.join(tmp, "log.txt")
+    os.environ["FEEDBACK_INDEX_PATH"] = os.path.join(tmp, "feedback_index.sqlite3")
+    os.environ["TELEMETRY_DB_PATH"] = os.path.join(tmp, "telemetry.sqlite3")
+    os.chdir(ROOT)
+    import transformer_game
+
+    return transformer_game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga: 429 e latência p95 antes/depois")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--quota", type=int, default=5, help="cota do mock (req/s)")
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    random.seed(0)
+    server, state, url = start_mock_server(latency=args.latency, quota_per_second=args.quota)
+
+    def direct(question):
+        return llm_client.complete(url, "token", question, "mock", {})
+
+    app = load_app()
+    _, single_flight = app.get_llm_rate_limiter()
+
+    def limited(question):
+        # Mesmo caminho de run_llm_request, sem gravar no cache de respostas
+        key = make_key(question, app.LLM_MODEL, app.LLM_PARAMS)
+        return single_flight.do(key, lambda: app.fetch_llm_reply(LLMJob(), url, "token", question, key))
+
+    results = [
+        run_scenario("antes (direto)", direct, args.sessions, args.concurrency, state),
+        run_scenario("depois (limitado)", limited, args.sessions, args.concurrency, state),
+    ]
+    server.shutdown()
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_client
+from llm_executor import LLMJob
+from llm_load_test import load_app
+from mock_llm_server import DEFAULT_REPLY, start_mock_server
+
+# --- Regressão do streaming da LLM com conexão cortada ---
+# Contra o mock local: um stream completo vira resposta e entra no cache;
+# um stream que termina sem "data: [DONE]" precisa levantar LLMError e não
+# pode deixar a resposta parcial gravada no cache de respostas do app.
+
+
+def main():
+    app = load_app()
+    app.LLM_CACHE_PATH = os.path.join(tempfile.mkdtemp(), "llm_responses.sqlite3")
+    server, state, url = start_mock_server(latency=0, token_delay=0)
+    cache = app.get_llm_cache()
+    falhas = []
+
+    completa = "o que é dₖ?"
+    resposta = app.run_llm_request(LLMJob(), url, "token", completa)
+    if resposta.strip() != DEFAULT_REPLY:
+        falhas.append(f"stream completo devolveu {resposta!r}")
+    if cache.get(completa, app.LLM_MODEL, app.LLM_PARAMS) is None:
+        falhas.append("stream completo não foi para o cache")
+
+    state.truncate_after = 3
+    cortada = "por que dividir por √dₖ?"
+    job = LLMJob()
+    try:
+        app.run_llm_request(job, url, "token", cortada)
+        falhas.append("stream cortado terminou sem erro")
+    except llm_client.LLMError:
+        pass
+    if cache.get(cortada, app.LLM_MODEL, app.LLM_PARAMS) is not None:
+        falhas.append("resposta parcial foi gravada no cache")
+    server.shutdown()
+
+    print(f"parcial recebida antes do corte: {job.partial_text()!r}")
+    if falhas:
+        sys.exit("FALHA: " + "; ".join(falhas))
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Servidor local que imita o endpoint de chat completions ---
+# Usado para testar o cliente da LLM offline: responde em JSON ou em SSE
+# (quando o payload pede "stream": true), com latência configurável e,
+# opcionalmente, uma cota de requisições por segundo que devolve 429 ou um
+# corte do stream no meio (sem "data: [DONE]") para simular queda de conexão.
+
+DEFAULT_REPLY = "A divisão por √dₖ mantém a softmax longe da saturação."
+
+
+class MockState:
+    def __init__(self, reply, latency, token_delay, quota_per_second, truncate_after=None):
+        self.reply = reply
+        self.truncate_after = truncate_after
+        self.latency = latency
+        self.token_delay = token_delay
+        self.quota_per_second = quota_per_second
+        self.requests = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def admit(self):
+        with self.lock:
+            self.requests += 1
+            if not self.quota_per_second:
+                return True
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            if self._window_count >= self.quota_per_second:
+                self.rejected += 1
+                return False
+            self._window_count += 1
+            return True
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    # O backlog padrão do socketserver (5) recusa conexões quando dezenas de
+    # sessões chegam juntas no teste de carga
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+
+            if not state.admit():
+                self._send_json(429, {"error": "rate limited"})
+                return
+
+            time.sleep(state.latency)
+
+            if not payload.get("stream"):
+                self._send_json(200, {"choices": [{"message": {"content": state.reply}}]})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            tokens = state.reply.split(" ")
+            for token in tokens[:state.truncate_after]:
+                chunk = {"choices": [{"delta": {"content": token + " "}}]}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                time.sleep(state.token_delay)
+            if state.truncate_after is None:
+                self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, text):
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def start_mock_server(port=0, reply=DEFAULT_REPLY, latency=0.05, token_delay=0.01, quota_per_second=0,
+                      truncate_after=None):
+    # Sobe o servidor numa thread e devolve (server, state, url)
+    state = MockState(reply, latency, token_delay, quota_per_second, truncate_after)
+    server = MockHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    return server, state, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock local do endpoint de chat completions")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    parser.add_argument("--quota", type=int, default=0, help="requisições por segundo (0 = sem limite)")
+    args = parser.parse_args()
+
+    server, _, url = start_mock_server(args.port, latency=args.latency,
+                                       token_delay=args.token_delay, quota_per_second=args.quota)
+    print(f"Mock LLM em {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from softmax_saturation import D_K_GRID, SEQ_LENGTHS, check_against_explicit, saturation_sweep
+from transformer_costs import check_against_paper
+
+# --- Conferência das contas numéricas do jogo ---
+# Cada verificação levanta ValueError quando o modelo diverge da referência
+# (números do artigo, Q e K sorteados de verdade). Roda todas e sai com código 1 se
+# alguma falhar, para poder rodar no CI junto com o startup_bench.
+
+SWEEP_PEAK_LIMIT_MB = 32
+
+
+def check_sweep_peak_memory(samples=5000, limit_mb=SWEEP_PEAK_LIMIT_MB):
+    # Maior varredura que a fase 2 oferece; roda dentro do worker do Streamlit,
+    # então o pico por clique precisa ficar limitado (medido pelo tracemalloc)
+    tracemalloc.start()
+    try:
+        saturation_sweep(D_K_GRID, SEQ_LENGTHS, samples)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+    if peak_mb > limit_mb:
+        raise ValueError(f"pico de {peak_mb:.1f} MB com {samples} amostras (limite {limit_mb} MB)")
+    return True
+
+
+CHECKS = {
+    "transformer_costs x Vaswani et al. (Tabelas 2 e 3)": check_against_paper,
+    "softmax_saturation x Q, K e Jacobiano explícitos": check_against_explicit,
+    f"softmax_saturation: pico de memória ≤ {SWEEP_PEAK_LIMIT_MB} MB": check_sweep_peak_memory,
+}
+
+
+def main():
+    falhas = []
+    for nome, check in CHECKS.items():
+        try:
+            check()
+            print(f"ok     {nome}")
+        except ValueError as e:
+            print(f"FALHA  {nome}: {e}")
+            falhas.append(nome)
+    if falhas:
+        sys.exit(f"FALHA: {len(falhas)} verificação(ões)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from streamlit.testing.v1 import AppTest
+
+from mock_llm_server import start_mock_server
+
+# --- Benchmark multi-sessão do fluxo completo do jogo ---
+# Cada sessão simulada (AppTest headless) percorre menu → fases 1-5 →
+# resumo, faz uma pergunta à LLM e envia um feedback. A LLM é um mock
+# local e o feedback vai para um arquivo temporário, sem GitHub.
+# AppTest não é thread-safe: cada sessão roda num processo próprio (spawn),
+# e o mock da LLM atende todas pelo HTTP local.
+# Saída em JSON para comparar versões.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ORDEM_FASE1 = ["Embedding", "Encoder", "Mecanismo de Atenção", "Decoder", "Camada de Saída"]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Sessao:
+    def __init__(self, llm_url):
+        self.at = AppTest.from_file(os.path.join(ROOT, "transformer_game.py"), default_timeout=60)
+        self.at.secrets["HF_TOKEN"] = "benchmark"
+        self.at.secrets["LLM_API_URL"] = llm_url
+        self.tempos = []
+
+    def run(self):
+        # O treino da fase 5 termina antes de seguir: um rerun de polling no
+        # meio do clique faria o roteiro perder o botão do resumo.
+        game = self.at.session_state["game"] if "game" in self.at.session_state else None
+        if game is not None and game.training is not None and not game.training.done:
+            game.training.finished.wait(60)
+        fase = game.phase if game is not None else "menu"
+        start = time.perf_counter()
+        self.at.run()
+        self.tempos.append((fase, time.perf_counter() - start))
+        if self.at.exception:
+            raise RuntimeError(f"{fase}: {self.at.exception}")
+
+    def clicar(self, rotulo=None, key=None):
+        if key is not None:
+            self.at.button(key=key).click()
+        else:
+            next(b for b in self.at.button if b.label.startswith(rotulo)).click()
+        self.run()
+
+    def jogar(self, pergunta):
+        at = self.at
+        self.run()
+        self.clicar("Iniciar Missão")
+
+        for i, componente in enumerate(ORDEM_FASE1):
+            at.selectbox(key=f"fase1_{i}").set_value(componente)
+        self.clicar("Verificar Ordem")
+        self.clicar(key="p1_advance_button")
+
+        at.slider(key="fase2_q").set_value(20)
+        at.slider(key="fase2_k").set_value(10)
+        self.run()
+        self.clicar(key="p2_advance_button")
+
+        at.sidebar.text_area(key="hf_chat_user_question").input(pergunta)
+        self.clicar(key="hf_chat_submit")
+        at.selectbox(key="p3_query").set_value(5)
+        self.run()
+        self.clicar(key="p3_advance_button")
+
+        at.radio(key="fase4_radio").set_value("Aprender a ordem e a distância entre os tokens")
+        self.run()
+        self.clicar(key="p4_advance_button")
+
+        at.radio(key="fase5_escolha").set_value("Transformer (big)")
+        self.run()
+        self.clicar(key="p5_summary_button")
+
+        at.sidebar.text_area[-1].input("feedback do benchmark")
+        self.clicar("Enviar Feedback")
+        return self.tempos
+
+
+def uma_sessao(url, i):
+    # Executado num processo filho; herda cwd e FEEDBACK_LOG_PATH do pai
+    import logging
+
+    logging.disable(logging.WARNING)
+    return Sessao(url).jogar(f"pergunta de benchmark número {i % 5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-sessão do fluxo completo do jogo")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    os.environ["FEEDBACK_LOG_PATH"] = os.path.join(tempfile.mkdtemp(), "log.txt")
+    server, _, url = start_mock_server(latency=args.llm_latency)
+
+    start = time.perf_counter()
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.concurrency, mp_context=contexto) as pool:
+        # Referência pelo nome do módulo: o AppTest troca o __main__ do processo filho
+        from session_load_bench import uma_sessao as sessao_remota
+
+        sessoes = list(pool.map(sessao_remota, [url] * args.sessions, range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    por_fase = {}
+    for tempos in sessoes:
+        for fase, tempo in tempos:
+            por_fase.setdefault(fase, []).append(tempo)
+
+    resultado = {
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "isolation": "process",
+        "wall_time_s": round(elapsed, 3),
+        "sessions_per_minute": round(args.sessions / elapsed * 60, 2),
+        # Maior RSS entre os processos de sessão (cada um com seu Streamlit)
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "phases": {
+            fase: {
+                "reruns": len(tempos),
+                "p50_s": round(statistics.median(tempos), 4),
+                "p95_s": round(percentile(tempos, 95), 4),
+                "p99_s": round(percentile(tempos, 99), 4),
+            }
+            for fase, tempos in por_fase.items()
+        },
+    }
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(saida + "\n")
+    else:
+        print(saida)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import types
+from concurrent.futures import Executor, Future
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_content import ContentRegistry, Phase
+from mock_llm_server import start_mock_server
+from session_load_bench import ROOT, Sessao
+
+# --- Memória de st.session_state por sessão ---
+# Percorre o jogo inteiro numa sessão simulada (mesmo roteiro do
+# session_load_bench) e, depois de cada rerun, mede quanto a sessão guarda:
+# as chaves visíveis em st.session_state e o SessionState interno do
+# Streamlit (valores de widgets, metadados, callbacks). Conteúdo das fases e
+# objetos compartilhados entre sessões não entram na conta.
+
+# Objetos compartilhados entre sessões (funções, módulos, classes, threads,
+# executores, conteúdo das fases) não contam: só o que a sessão mantém vivo
+# por conta própria.
+SHARED_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+    Executor, threading.Thread, type(threading.Lock()), threading.Event, threading.Condition,
+)
+SHARED = (Phase, ContentRegistry)
+
+
+def deep_sizeof(obj, skip=(), _seen=None):
+    # Tamanho aproximado em bytes de obj e de tudo que ele referencia
+    seen = set() if _seen is None else _seen
+    if obj is None or isinstance(obj, bool) or id(obj) in seen or isinstance(obj, SHARED_TYPES + tuple(skip)):
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, np.ndarray):
+        return size if obj.base is None else size + deep_sizeof(obj.base, skip, seen)
+    if isinstance(obj, (str, bytes, bytearray, int, float, complex, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, skip, seen) + deep_sizeof(v, skip, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, skip, seen) for item in obj)
+    elif isinstance(obj, Future):
+        size += deep_sizeof(obj._result, skip, seen)  # o resto é do executor
+        return size
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), skip, seen)
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if hasattr(obj, name):
+                size += deep_sizeof(getattr(obj, name), skip, seen)
+    return size
+
+
+def session_footprint(state, skip=()):
+    # Bytes por chave de um mapeamento (st.session_state ou equivalente)
+    seen = set()
+    return {key: deep_sizeof(state[key], skip, seen) for key in list(state.keys())}
+
+
+def medir(at):
+    interno = at.session_state._state._state  # SessionState sob o SafeSessionState
+    visivel = interno.filtered_state
+    por_chave = session_footprint(visivel, skip=SHARED)
+    return {
+        "keys": len(visivel),
+        "user_bytes": sum(por_chave.values()),
+        "total_bytes": deep_sizeof(interno, skip=SHARED),
+        "largest": sorted(por_chave.items(), key=lambda kv: kv[1], reverse=True)[:5],
+    }
+
+
+class SessaoMedida(Sessao):
+    def __init__(self, llm_url):
+        super().__init__(llm_url)
+        self.medidas = []
+
+    def run(self):
+        super().run()
+        self.medidas.append((self.at.session_state["game"].phase, medir(self.at)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes de session_state por sessão, fase a fase")
+    parser.add_argument("--idle-sessions", type=int, default=1000, help="projeção para N sessões paradas")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    os.environ["FEEDBACK_LOG_PATH"] = os.path.join(tempfile.mkdtemp(), "log.txt")
+    server, _, url = start_mock_server(latency=0.05)
+    sessao = SessaoMedida(url)
+    sessao.jogar("o que é multi-head attention?")
+    server.shutdown()
+
+    # Último rerun de cada fase: o que fica guardado enquanto o jogador lê
+    por_fase = {}
+    for fase, medida in sessao.medidas:
+        por_fase[fase] = medida
+    final = sessao.medidas[-1][1]
+    pico = max(m["total_bytes"] for _, m in sessao.medidas)
+
+    print(json.dumps({
+        "phases": {
+            fase: {**m, "largest": [f"{k}: {v}" for k, v in m["largest"]]} for fase, m in por_fase.items()
+        },
+        "peak_total_bytes": pico,
+        "final_total_bytes": final["total_bytes"],
+        "idle_sessions": args.idle_sessions,
+        "idle_projection_mb": round(final["total_bytes"] * args.idle_sessions / 2**20, 2),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# --- Benchmark de inicialização a frio ---
+# Cada amostra roda num processo Python novo (como uma réplica recém-criada):
+# mede o import do Streamlit e o tempo até o menu inicial renderizar, e
+# confere que dependências pesadas (matplotlib, requests, PyGithub, ...) não
+# foram carregadas antes de serem usadas. Sai com código 1 se estourar o
+# orçamento, para poder rodar no CI.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ["matplotlib", "requests", "github", "pandas"]
+
+
+def child():
+    import logging
+
+    logging.disable(logging.WARNING)
+    os.chdir(ROOT)
+
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    import_s = time.perf_counter() - start
+
+    at = AppTest.from_file(os.path.join(ROOT, "transformer_game.py"), default_timeout=60)
+    start = time.perf_counter()
+    at.run()
+    first_render_s = time.perf_counter() - start
+
+    menu_ok = not at.exception and any(b.label.startswith("Iniciar Missão") for b in at.button)
+    print(json.dumps({
+        "import_s": import_s,
+        "first_render_s": first_render_s,
+        "menu_ok": menu_ok,
+        "loaded": [m for m in LAZY_MODULES if m in sys.modules],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização a frio do jogo")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget", type=float, default=1.0, help="segundos (mediana)")
+    parser.add_argument("--render-budget", type=float, default=0.75, help="segundos (mediana)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    amostras = []
+    for _ in range(args.runs):
+        saida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            capture_output=True, text=True, check=True,
+        )
+        amostras.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+
+    import_s = statistics.median(a["import_s"] for a in amostras)
+    render_s = statistics.median(a["first_render_s"] for a in amostras)
+    carregados = sorted({m for a in amostras for m in a["loaded"]})
+    falhas = []
+    if import_s > args.import_budget:
+        falhas.append(f"import {import_s:.3f}s > {args.import_budget}s")
+    if render_s > args.render_budget:
+        falhas.append(f"primeiro render {render_s:.3f}s > {args.render_budget}s")
+    if carregados:
+        falhas.append(f"módulos pesados carregados no menu: {', '.join(carregados)}")
+    if not all(a["menu_ok"] for a in amostras):
+        falhas.append("menu não renderizou")
+
+    print(json.dumps({
+        "runs": args.runs,
+        "import_median_s": round(import_s, 4),
+        "first_render_median_s": round(render_s, 4),
+        "first_render_max_s": round(max(a["first_render_s"] for a in amostras), 4),
+        "eager_heavy_modules": carregados,
+        "ok": not falhas,
+    }, indent=2))
+    if falhas:
+        sys.exit("FALHA: " + "; ".join(falhas))
+
+
+if __name__ == "__main__":
+    main()
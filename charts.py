@@ -0,0 +1,124 @@
+import io
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from positional_encoding import downsampled_columns
+
+# --- Renderização de gráficos sem pyplot ---
+# As figuras são criadas com a API orientada a objetos (matplotlib.figure),
+# que não registra nada no estado global do pyplot, e viram bytes PNG/SVG.
+# Os bytes ficam num cache LRU limitado, chaveado pelos parâmetros do gráfico.
+# O matplotlib só é importado quando a primeira figura é desenhada.
+
+class ChartCache:
+    def __init__(self, max_entries=64, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = render()
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self._size += len(data)
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+def figure_to_bytes(fig, fmt="png", dpi=100):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def positional_encoding_figure(comprimento, dim, dim_destaque, n_points=1000):
+    # Só as colunas plotadas são calculadas; cada série é reduzida (LTTB)
+    # a no máximo n_points pontos, mantendo o custo do gráfico constante.
+    from matplotlib.figure import Figure
+
+    series = downsampled_columns(comprimento, dim, (0, 1, dim_destaque), n_points)
+
+    fig = Figure(figsize=(8, 3))
+    ax = fig.subplots()
+    rotulos = ["Dimensão 0 (seno)", "Dimensão 1 (cosseno)", f"Dimensão {dim_destaque} (seno)"]
+    for (x, y), rotulo in zip(series, rotulos):
+        ax.plot(x, y, label=rotulo)
+    ax.set_title("Variação senoidal em dimensões do Positional Encoding")
+    ax.set_xlabel("Posição do token")
+    ax.legend()
+    return fig
+
+
+def render_chart(cache, build_figure, *params, fmt="png"):
+    key = (build_figure.__name__, params, fmt)
+    return cache.get_or_render(key, lambda: figure_to_bytes(build_figure(*params), fmt))
+
+
+def attention_heatmaps_figure(weights, tokens, first_head=0, ncols=4):
+    # Um mapa de calor [seq × seq] por cabeça; rótulos só em frases curtas
+    from matplotlib.figure import Figure
+
+    n_heads = len(weights)
+    nrows = math.ceil(n_heads / ncols)
+    fig = Figure(figsize=(3 * ncols, 3 * nrows))
+    axes = np.atleast_1d(fig.subplots(nrows, ncols)).ravel()
+    show_labels = len(tokens) <= 20
+    for i, ax in enumerate(axes):
+        if i >= n_heads:
+            ax.axis("off")
+            continue
+        ax.imshow(weights[i], cmap="viridis", vmin=0, vmax=1, interpolation="nearest")
+        ax.set_title(f"Cabeça {first_head + i + 1}", fontsize=10)
+        if show_labels:
+            ax.set_xticks(range(len(tokens)), tokens, rotation=90, fontsize=7)
+            ax.set_yticks(range(len(tokens)), tokens, fontsize=7)
+        else:
+            ax.set_xticks([])
+            ax.set_yticks([])
+    fig.tight_layout()
+    return fig
+
+
+def saturation_heatmaps_figure(values, d_k, seq_lengths, titles, label, vmin=None, vmax=None):
+    # Um mapa de calor [n × dₖ] por variante (sem/com ÷√dₖ), na mesma escala de cor
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(11, 1.2 + 0.5 * len(seq_lengths)))
+    axes = fig.subplots(1, len(values), sharey=True)
+    vmin = values.min() if vmin is None else vmin
+    vmax = values.max() if vmax is None else vmax
+    for ax, grid, title in zip(axes, values, titles):
+        image = ax.imshow(grid, cmap="magma", vmin=vmin, vmax=vmax, aspect="auto", interpolation="nearest")
+        for (i, j), value in np.ndenumerate(grid):
+            claro = value < vmin + 0.5 * (vmax - vmin)
+            ax.text(j, i, f"{value:.2f}", ha="center", va="center", fontsize=6, color="white" if claro else "black")
+        ax.set_title(title, fontsize=10)
+        ax.set_xticks(range(len(d_k)), [str(d) for d in d_k], rotation=90, fontsize=7)
+        ax.set_xlabel("dₖ")
+    axes[0].set_yticks(range(len(seq_lengths)), [str(n) for n in seq_lengths], fontsize=7)
+    axes[0].set_ylabel("chaves (n)")
+    fig.colorbar(image, ax=list(axes), label=label, fraction=0.03, pad=0.02)
+    return fig
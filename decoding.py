@@ -0,0 +1,122 @@
+import math
+import time
+
+import numpy as np
+
+from attention import softmax
+from positional_encoding import encode_positions
+
+# --- Decoder-only em NumPy para simular geração autoregressiva ---
+# Sem cache, cada novo token reprocessa o prefixo inteiro (custo total
+# quadrático). Com cache, as chaves/valores de cada camada ficam num buffer
+# circular pré-alocado e cada passo só processa o token novo (custo linear).
+
+class KVCache:
+    def __init__(self, n_layers, n_heads, capacity, d_head, dtype=np.float32):
+        # Buffers alocados uma única vez: [camadas, cabeças, capacidade, d_head]
+        self.keys = np.zeros((n_layers, n_heads, capacity, d_head), dtype=dtype)
+        self.values = np.zeros_like(self.keys)
+        self.capacity = capacity
+        self.length = 0
+
+    def append(self, layer, k, v):
+        # k, v: [cabeças, d_head]; ao encher, sobrescreve a entrada mais antiga
+        slot = self.length % self.capacity
+        self.keys[layer, :, slot] = k
+        self.values[layer, :, slot] = v
+
+    def advance(self):
+        self.length += 1
+
+    def view(self, layer):
+        valid = min(self.length + 1, self.capacity)
+        return self.keys[layer, :, :valid], self.values[layer, :, :valid]
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.values.nbytes
+
+    def bytes_per_token(self):
+        return self.nbytes // self.capacity
+
+
+class TinyDecoder:
+    def __init__(self, vocab=256, d_model=64, n_heads=4, n_layers=2, seed=0):
+        rng = np.random.default_rng(seed)
+        self.vocab, self.d_model, self.n_heads, self.n_layers = vocab, d_model, n_heads, n_layers
+        self.d_head = d_model // n_heads
+        scale = 1 / math.sqrt(d_model)
+        self.embedding = rng.standard_normal((vocab, d_model)).astype(np.float32) * scale
+        self.layers = [
+            {
+                "w_qkv": (rng.standard_normal((d_model, 3 * d_model)) * scale).astype(np.float32),
+                "w_o": (rng.standard_normal((d_model, d_model)) * scale).astype(np.float32),
+                "w_1": (rng.standard_normal((d_model, 4 * d_model)) * scale).astype(np.float32),
+                "w_2": (rng.standard_normal((4 * d_model, d_model)) * scale / 2).astype(np.float32),
+            }
+            for _ in range(n_layers)
+        ]
+
+    def _split_heads(self, x):
+        # [seq, d_model] -> [cabeças, seq, d_head]
+        return x.reshape(x.shape[0], self.n_heads, self.d_head).transpose(1, 0, 2)
+
+    def _embed(self, tokens, start):
+        return self.embedding[tokens] + encode_positions(np.arange(start, start + len(tokens)), self.d_model)
+
+    def _mlp(self, layer, x):
+        return np.maximum(x @ layer["w_1"], 0) @ layer["w_2"]
+
+    def forward_full(self, tokens):
+        # Processa a sequência inteira com máscara causal; devolve os logits do último token
+        x = self._embed(tokens, 0)
+        n = len(tokens)
+        mask = np.triu(np.ones((n, n), dtype=bool), k=1)
+        for layer in self.layers:
+            q, k, v = np.split(x @ layer["w_qkv"], 3, axis=-1)
+            q, k, v = self._split_heads(q), self._split_heads(k), self._split_heads(v)
+            scores = q @ k.transpose(0, 2, 1) / math.sqrt(self.d_head)
+            scores[:, mask] = -np.inf
+            h = (softmax(scores) @ v).transpose(1, 0, 2).reshape(n, self.d_model)
+            x = x + h @ layer["w_o"]
+            x = x + self._mlp(layer, x)
+        return x[-1] @ self.embedding.T
+
+    def forward_cached(self, token, position, cache):
+        # Processa só o token novo, lendo K/V anteriores do cache
+        x = self._embed(np.array([token]), position)
+        for i, layer in enumerate(self.layers):
+            q, k, v = np.split(x @ layer["w_qkv"], 3, axis=-1)
+            cache.append(i, k.reshape(self.n_heads, self.d_head), v.reshape(self.n_heads, self.d_head))
+            keys, values = cache.view(i)
+            q = q.reshape(self.n_heads, 1, self.d_head)
+            scores = q @ keys.transpose(0, 2, 1) / math.sqrt(self.d_head)
+            h = (softmax(scores) @ values).reshape(1, self.d_model)
+            x = x + h @ layer["w_o"]
+            x = x + self._mlp(layer, x)
+        cache.advance()
+        return x[-1] @ self.embedding.T
+
+    def new_cache(self, capacity):
+        return KVCache(self.n_layers, self.n_heads, capacity, self.d_head)
+
+
+def generate(model, prompt, n_new, use_cache=True, capacity=None):
+    # Geração gulosa; devolve os tokens e o tempo (s) de cada passo
+    tokens = list(prompt)
+    step_times = []
+    cache = model.new_cache(capacity or len(prompt) + n_new) if use_cache else None
+
+    if use_cache:
+        for position, token in enumerate(tokens[:-1]):
+            model.forward_cached(token, position, cache)
+
+    for _ in range(n_new):
+        start = time.perf_counter()
+        if use_cache:
+            logits = model.forward_cached(tokens[-1], len(tokens) - 1, cache)
+        else:
+            logits = model.forward_full(np.array(tokens))
+        tokens.append(int(np.argmax(logits)))
+        step_times.append(time.perf_counter() - start)
+    return tokens, step_times, cache
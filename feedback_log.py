@@ -0,0 +1,306 @@
+import argparse
+import datetime
+import glob
+import html
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+# --- Leitura indexada do log de feedback ---
+# O log ("[AAAA-MM-DD HH:MM:SS] texto", uma entrada por linha) é dividido em
+# segmentos: log.txt é o ativo e, passado o limite de tamanho, é renomeado
+# para log.00001.txt, log.00002.txt, ... Um índice SQLite guarda, por
+# segmento, até que byte já foi lido e, por entrada, offset, tamanho e
+# timestamp, além de um índice invertido de termos. Cada sync() lê só os
+# bytes novos; as consultas (intervalo de tempo, busca, página) rodam no
+# índice e só as entradas da página são lidas do disco.
+
+DEFAULT_INDEX_PATH = ".cache/feedback_index.sqlite3"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+ENTRY_RE = re.compile(rb"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] ?")
+TERM_RE = re.compile(r"\w+")
+INDEX_BATCH = 5000  # entradas por executemany ao indexar
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS segments ("
+    " id INTEGER PRIMARY KEY, inode INTEGER NOT NULL, name TEXT NOT NULL,"
+    " indexed_bytes INTEGER NOT NULL DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS entries ("
+    " id INTEGER PRIMARY KEY, segment INTEGER NOT NULL, offset INTEGER NOT NULL,"
+    " length INTEGER NOT NULL, ts TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS entries_ts ON entries (ts, id)",
+    "CREATE INDEX IF NOT EXISTS entries_segment ON entries (segment, offset)",
+    "CREATE TABLE IF NOT EXISTS terms ("
+    " term TEXT NOT NULL, entry INTEGER NOT NULL, PRIMARY KEY (term, entry)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS terms_entry ON terms (entry)",
+]
+
+
+def segment_paths(path):
+    # Segmentos rotacionados em ordem (mais antigo primeiro) e o ativo por último
+    stem, ext = os.path.splitext(path)
+    rotated = []
+    for candidate in glob.glob(f"{glob.escape(stem)}.*{ext}"):
+        number = candidate[len(stem) + 1:len(candidate) - len(ext)]
+        if number.isdigit():
+            rotated.append((int(number), candidate))
+    return [p for _, p in sorted(rotated)] + [path]
+
+
+def rotate(path, max_bytes):
+    # Chamado por quem escreve no log, entre um lote e outro
+    try:
+        if os.path.getsize(path) < max_bytes:
+            return None
+    except OSError:
+        return None
+    stem, ext = os.path.splitext(path)
+    rotated = segment_paths(path)[:-1]
+    number = int(rotated[-1][len(stem) + 1:len(rotated[-1]) - len(ext)]) + 1 if rotated else 1
+    target = f"{stem}.{number:05d}{ext}"
+    os.replace(path, target)
+    return target
+
+
+def normalize(text):
+    # Minúsculas e sem acentos: "Atenção" e "atencao" caem no mesmo termo
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def terms(text):
+    return set(TERM_RE.findall(normalize(text)))
+
+
+def _bound(value, end=False):
+    # Aceita datetime, date ou string ("AAAA-MM-DD" ou no formato do log)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        if len(value) != 10:
+            return value
+        value = datetime.date.fromisoformat(value)
+    if isinstance(value, datetime.datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return f"{value.isoformat()} {'23:59:59' if end else '00:00:00'}"
+
+
+@dataclass(frozen=True)
+class FeedbackEntry:
+    id: int
+    timestamp: str
+    text: str
+    segment: str
+
+
+@dataclass(frozen=True)
+class FeedbackPage:
+    entries: list
+    total: int
+    page: int
+    per_page: int
+
+    @property
+    def pages(self):
+        return max(1, -(-self.total // self.per_page))
+
+
+class FeedbackLog:
+    def __init__(self, path, index_path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def sync(self):
+        # Segmentos são reconhecidos pelo inode, que sobrevive ao rename da
+        # rotação: o log.txt indexado vira log.00001.txt sem ser relido.
+        added = 0
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")  # outro processo não indexa os mesmos bytes
+            known = {
+                inode: (segment_id, name, indexed)
+                for segment_id, inode, name, indexed in conn.execute(
+                    "SELECT id, inode, name, indexed_bytes FROM segments"
+                )
+            }
+            seen = set()
+            for path in segment_paths(self.path):
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                name = os.path.basename(path)
+                segment_id, old_name, indexed = known.get(stat.st_ino, (None, name, 0))
+                if segment_id is not None and stat.st_size < indexed:
+                    # Truncado ou inode reaproveitado: indexa do zero
+                    self._drop_segments(conn, [segment_id])
+                    segment_id, indexed = None, 0
+                if segment_id is None:
+                    segment_id = conn.execute(
+                        "INSERT INTO segments (inode, name) VALUES (?, ?)", (stat.st_ino, name)
+                    ).lastrowid
+                elif old_name != name:
+                    conn.execute("UPDATE segments SET name = ? WHERE id = ?", (name, segment_id))
+                seen.add(segment_id)
+                if stat.st_size > indexed:
+                    added += self._index_segment(conn, segment_id, path, indexed)
+            self._drop_segments(conn, [row[0] for row in known.values() if row[0] not in seen])
+        return added
+
+    def _index_segment(self, conn, segment_id, path, start):
+        # Entradas e termos vão para o SQLite em lotes (executemany), com ids
+        # atribuídos aqui; o BEGIN IMMEDIATE do sync() garante que são únicos.
+        last = conn.execute(
+            "SELECT id, offset FROM entries WHERE segment = ? ORDER BY offset DESC LIMIT 1", (segment_id,)
+        ).fetchone()
+        next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM entries").fetchone()[0]
+        pending, pending_terms = {}, []
+        added = 0
+        offset = start
+
+        def flush():
+            conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?)", [(i, *row) for i, row in pending.items()])
+            conn.executemany("INSERT OR IGNORE INTO terms VALUES (?, ?)", pending_terms)
+            pending.clear()
+            pending_terms.clear()
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # linha ainda sendo escrita; fica para o próximo sync
+                match = ENTRY_RE.match(line)
+                if match or last is None:
+                    # Linha sem timestamp no início do segmento vira entrada sem data
+                    if len(pending) >= INDEX_BATCH:
+                        flush()
+                    entry_id, next_id = next_id, next_id + 1
+                    pending[entry_id] = [segment_id, offset, len(line), match.group(1).decode() if match else ""]
+                    last = (entry_id, offset)
+                    added += 1
+                else:
+                    # Continuação de um feedback com várias linhas
+                    entry_id = last[0]
+                    length = offset + len(line) - last[1]
+                    if entry_id in pending:
+                        pending[entry_id][2] = length
+                    else:
+                        conn.execute("UPDATE entries SET length = ? WHERE id = ?", (length, entry_id))
+                text = line[match.end():] if match else line
+                pending_terms.extend(
+                    (term, entry_id) for term in terms(html.unescape(text.decode("utf-8", errors="replace")))
+                )
+                offset += len(line)
+        flush()
+        conn.execute("UPDATE segments SET indexed_bytes = ? WHERE id = ?", (offset, segment_id))
+        return added
+
+    def _drop_segments(self, conn, segment_ids):
+        for segment_id in segment_ids:
+            conn.execute(
+                "DELETE FROM terms WHERE entry IN (SELECT id FROM entries WHERE segment = ?)", (segment_id,)
+            )
+            conn.execute("DELETE FROM entries WHERE segment = ?", (segment_id,))
+            conn.execute("DELETE FROM segments WHERE id = ?", (segment_id,))
+
+    def query(self, start=None, end=None, text=None, page=1, per_page=20, sync=True):
+        # Mais recentes primeiro; cada termo da busca precisa aparecer (prefixo)
+        if sync:
+            self.sync()
+        where, params = [], []
+        if start is not None:
+            where.append("e.ts >= ?")
+            params.append(_bound(start))
+        if end is not None:
+            where.append("e.ts <= ?")
+            params.append(_bound(end, end=True))
+        for term in sorted(terms(text or "")):
+            where.append("e.id IN (SELECT entry FROM terms WHERE term >= ? AND term < ?)")
+            params += [term, term + "\uffff"]
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM entries e{clause}", params).fetchone()[0]
+            page = min(max(1, page), max(1, -(-total // per_page)))  # página além da última → última
+            rows = conn.execute(
+                f"SELECT e.id, e.ts, s.name, e.offset, e.length FROM entries e"
+                f" JOIN segments s ON s.id = e.segment{clause}"
+                f" ORDER BY e.ts DESC, e.id DESC LIMIT ? OFFSET ?",
+                params + [per_page, (page - 1) * per_page],
+            ).fetchall()
+        return FeedbackPage(self._read(rows), total, page, per_page)
+
+    def _read(self, rows):
+        # Lê só as entradas da página, abrindo cada segmento uma vez
+        directory = os.path.dirname(self.path)
+        texts = {}
+        for name in {row[2] for row in rows}:
+            try:
+                with open(os.path.join(directory, name), "rb") as f:
+                    for entry_id, _, row_name, offset, length in rows:
+                        if row_name == name:
+                            f.seek(offset)
+                            texts[entry_id] = f.read(length)
+            except FileNotFoundError:
+                continue  # rotacionado/removido depois do sync; some na próxima página
+        entries = []
+        for entry_id, ts, name, _, _ in rows:
+            raw = texts.get(entry_id)
+            if raw is None:
+                continue
+            body = ENTRY_RE.sub(b"", raw, count=1).decode("utf-8", errors="replace").rstrip("\n")
+            entries.append(FeedbackEntry(entry_id, ts, html.unescape(body), name))
+        return entries
+
+    def stats(self):
+        with self._connect() as conn:
+            entries, first, last = conn.execute("SELECT COUNT(*), MIN(ts), MAX(ts) FROM entries").fetchone()
+            segments, indexed = conn.execute("SELECT COUNT(*), COALESCE(SUM(indexed_bytes), 0) FROM segments").fetchone()
+        return {"entries": entries, "segments": segments, "indexed_bytes": indexed, "first": first, "last": last}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta o log de feedback pelo índice")
+    parser.add_argument("path", nargs="?", default="feedbacks/log.txt")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    parser.add_argument("--since", help="AAAA-MM-DD[ HH:MM:SS]")
+    parser.add_argument("--until", help="AAAA-MM-DD[ HH:MM:SS]")
+    parser.add_argument("--search")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--rotate", type=int, metavar="BYTES", help="rotaciona o log se passar deste tamanho")
+    args = parser.parse_args()
+
+    if args.rotate:
+        target = rotate(args.path, args.rotate)
+        print(f"rotacionado para {target}" if target else "abaixo do limite; nada a rotacionar")
+
+    log = FeedbackLog(args.path, args.index)
+    result = log.query(args.since, args.until, args.search, args.page, args.per_page)
+    for entry in result.entries:
+        print(f"[{entry.timestamp}] {entry.text}")
+    print(f"-- página {result.page}/{result.pages} · {result.total} entrada(s)")
+
+
+if __name__ == "__main__":
+    main()
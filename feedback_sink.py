@@ -0,0 +1,128 @@
+import logging
+import os
+from abc import ABC, abstractmethod
+
+from batch_worker import BatchWorker
+from feedback_log import rotate
+
+logger = logging.getLogger(__name__)
+
+# --- Backends de armazenamento do feedback ---
+# Cada backend recebe um lote de linhas já formatadas ("[timestamp] texto\n")
+# e as persiste de uma só vez.
+
+class FeedbackBackend(ABC):
+    @abstractmethod
+    def write_batch(self, lines):
+        ...
+
+
+class LocalFileBackend(FeedbackBackend):
+    # Arquivo local append-only, no mesmo formato de feedbacks/log.txt.
+    # Com max_bytes, o arquivo vira um segmento (log.00001.txt, ...) ao
+    # passar do limite; o próximo lote começa um log.txt novo.
+    def __init__(self, path, max_bytes=None):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def write_batch(self, lines):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+        if self.max_bytes:
+            rotate(self.path, self.max_bytes)
+
+
+class GithubBackend(FeedbackBackend):
+    # Um único commit por lote; em caso de conflito de SHA (outro processo
+    # escreveu no meio), relê o arquivo e tenta de novo.
+    def __init__(self, token, repo_name, file_path, max_retries=3):
+        self.token = token
+        self.repo_name = repo_name
+        self.file_path = file_path
+        self.max_retries = max_retries
+        self._repo = None
+
+    def _get_repo(self):
+        if self._repo is None:
+            from github import Github
+            self._repo = Github(self.token).get_repo(self.repo_name)
+        return self._repo
+
+    def write_batch(self, lines):
+        from github import GithubException
+
+        repo = self._get_repo()
+        batch_text = "".join(lines)
+        message = f"append {len(lines)} feedback(s)"
+
+        for attempt in range(self.max_retries):
+            try:
+                contents = repo.get_contents(self.file_path)
+            except GithubException as e:
+                if e.status != 404:
+                    raise
+                repo.create_file(self.file_path, "create feedback log", batch_text)
+                return
+            try:
+                new_content = contents.decoded_content.decode() + batch_text
+                repo.update_file(self.file_path, message, new_content, contents.sha)
+                return
+            except GithubException as e:
+                if e.status != 409 or attempt == self.max_retries - 1:
+                    raise
+
+
+# --- Fila em processo + worker em segundo plano ---
+# Com local_copy, cada lote aceito é gravado primeiro no arquivo local (que
+# o leitor de feedback_log indexa) e depois no backend principal. Um lote
+# que falha no principal é tentado de novo com backoff; se todas as
+# tentativas falharem, continua guardado na cópia local. Só é descartado,
+# com log, se não houver cópia local.
+class FeedbackSink:
+    def __init__(self, backend, local_copy=None, max_batch=20, flush_interval=5.0, retries=3, retry_delay=1.0):
+        self.backend = backend
+        self.local_copy = local_copy
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.errors = 0
+        self.dropped = 0
+        self._worker = BatchWorker(self._write, "feedback-sink", max_batch, flush_interval)
+
+    def submit(self, line):
+        # Retorna imediatamente; a escrita acontece no worker
+        self._worker.put(line)
+
+    def pending(self):
+        return self._worker.pending()
+
+    def _write(self, batch):
+        copied = False
+        if self.local_copy is not None:
+            try:
+                self.local_copy.write_batch(batch)
+                copied = True
+            except Exception:
+                logger.exception("feedback local copy failed")
+
+        for attempt in range(self.retries + 1):
+            try:
+                self.backend.write_batch(batch)
+                return
+            except Exception:
+                self.errors += 1
+                logger.warning("feedback batch of %d failed (attempt %d)", len(batch), attempt + 1, exc_info=True)
+            if attempt < self.retries:
+                # Durante o close() não espera: tenta de novo logo e desiste
+                self._worker.wait(self.retry_delay * 2 ** attempt)
+
+        if copied:
+            logger.error("feedback batch of %d kept only in the local copy", len(batch))
+            return
+        self.dropped += len(batch)
+        logger.error("dropped %d feedback line(s)", len(batch))
+
+    def close(self, timeout=10.0):
+        self._worker.close(timeout)
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import textwrap
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+# --- Conteúdo das fases (content pack) ---
+# Textos, quizzes e tabelas de cada fase ficam num arquivo JSON em content/.
+# Ele é lido e validado uma vez e vira um registro imutável: markdown já
+# montado (listas de linhas → string), listas → tuplas, dicts → mappings
+# somente leitura. ContentStore relê o arquivo quando ele muda no disco,
+# sem reiniciar o processo; um pack inválido não substitui o último válido.
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content")
+DEFAULT_PACK_PATH = os.path.join(CONTENT_DIR, "padrao.json")
+
+REQUIRED_PHASE_FIELDS = ("id", "label", "view", "title")
+
+
+class ContentPackError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Phase:
+    id: str
+    label: str
+    view: str
+    title: str
+    next: str
+    advance_label: str
+    markdown: MappingProxyType
+    data: MappingProxyType
+
+    def md(self, name):
+        return self.markdown.get(name, "")
+
+
+@dataclass(frozen=True)
+class ContentRegistry:
+    name: str
+    version: int
+    digest: str
+    start: str
+    phases: MappingProxyType
+    knowledge_base: tuple
+
+    def phase(self, phase_id):
+        return self.phases.get(phase_id)
+
+
+def compile_markdown(block):
+    # Aceita string ou lista de linhas; o resultado é montado uma única vez
+    text = "\n".join(block) if isinstance(block, (list, tuple)) else block
+    if not isinstance(text, str):
+        raise ContentPackError(f"markdown block must be a string or list of lines, got {type(block).__name__}")
+    return textwrap.dedent(text).strip("\n")
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def _validate_quiz(phase_id, quiz):
+    for field in ("question", "options", "answer", "success", "error"):
+        if field not in quiz:
+            raise ContentPackError(f"{phase_id}: quiz is missing '{field}'")
+    if quiz["answer"] not in quiz["options"]:
+        raise ContentPackError(f"{phase_id}: quiz answer is not one of the options")
+
+
+def _validate_assembly(phase_id, assembly):
+    for field in ("components", "answer", "hints", "success", "error"):
+        if field not in assembly:
+            raise ContentPackError(f"{phase_id}: assembly is missing '{field}'")
+    if sorted(assembly["answer"]) != sorted(assembly["components"]):
+        raise ContentPackError(f"{phase_id}: assembly answer must use every component once")
+    if len(assembly["hints"]) != len(assembly["answer"]):
+        raise ContentPackError(f"{phase_id}: assembly needs one hint per position")
+
+
+def parse_content_pack(raw, views=None):
+    # views: nomes de views que o app sabe desenhar (None pula essa checagem)
+    pack = json.loads(raw)
+    phases = {}
+    for entry in pack.get("phases", []):
+        missing = [f for f in REQUIRED_PHASE_FIELDS if not entry.get(f)]
+        if missing:
+            raise ContentPackError(f"phase {entry.get('id', '?')} is missing {', '.join(missing)}")
+        phase_id = entry["id"]
+        if phase_id in phases:
+            raise ContentPackError(f"duplicate phase id '{phase_id}'")
+        if views is not None and entry["view"] not in views:
+            raise ContentPackError(f"{phase_id}: unknown view '{entry['view']}'")
+        if "quiz" in entry:
+            _validate_quiz(phase_id, entry["quiz"])
+        if "assembly" in entry:
+            _validate_assembly(phase_id, entry["assembly"])
+
+        extra = {k: v for k, v in entry.items() if k not in Phase.__dataclass_fields__}
+        phases[phase_id] = Phase(
+            id=phase_id,
+            label=entry["label"],
+            view=entry["view"],
+            title=entry["title"],
+            next=entry.get("next"),
+            advance_label=entry.get("advance_label", "Avançar ➡️"),
+            markdown=MappingProxyType({k: compile_markdown(v) for k, v in entry.get("markdown", {}).items()}),
+            data=freeze(extra),
+        )
+
+    if not phases:
+        raise ContentPackError("content pack has no phases")
+    start = pack.get("start", next(iter(phases)))
+    for phase_id in [start] + [p.next for p in phases.values() if p.next]:
+        if phase_id not in phases:
+            raise ContentPackError(f"reference to unknown phase '{phase_id}'")
+
+    knowledge_base = []
+    for item in pack.get("knowledge_base", []):
+        phase_id, _, block = item["block"].partition(".")
+        text = phases[phase_id].markdown.get(block) if phase_id in phases else None
+        if text is None:
+            raise ContentPackError(f"knowledge base entry '{item['title']}' points to missing block '{item['block']}'")
+        knowledge_base.append((item["title"], text))
+
+    return ContentRegistry(
+        name=pack.get("name", ""),
+        version=pack.get("version", 1),
+        digest=hashlib.sha256(raw).hexdigest()[:16],
+        start=start,
+        phases=MappingProxyType(phases),
+        knowledge_base=tuple(knowledge_base),
+    )
+
+
+def load_content_pack(path=DEFAULT_PACK_PATH, views=None):
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        return parse_content_pack(raw, views)
+    except (json.JSONDecodeError, KeyError, TypeError) as exc:
+        raise ContentPackError(f"{path}: {exc}") from exc
+
+
+class ContentStore:
+    def __init__(self, path=DEFAULT_PACK_PATH, views=None):
+        self.path = path
+        self.views = frozenset(views) if views is not None else None
+        self.reloads = 0
+        self.last_error = None
+        self._mtime = None
+        self._registry = None
+        self._lock = threading.Lock()
+        self.current()
+
+    def current(self):
+        # Um stat() por chamada; o arquivo só é relido quando o mtime muda
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as exc:
+            if self._registry is None:
+                raise
+            self.last_error = exc
+            return self._registry
+
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    try:
+                        self._registry = load_content_pack(self.path, self.views)
+                        self.reloads += 1
+                        self.last_error = None
+                    except (OSError, ContentPackError) as exc:
+                        if self._registry is None:
+                            raise
+                        self.last_error = exc
+                    self._mtime = mtime
+        return self._registry
@@ -0,0 +1,63 @@
+import uuid
+
+# --- Estado de uma sessão do jogo ---
+# Tudo que o app guarda por sessão fica num único GameState em
+# st.session_state["game"]: progresso, tentativas, o treino da fase 5 e a
+# pergunta em andamento para a LLM. Com __slots__ não há __dict__ por
+# instância, e cada campo tem um dono só. reset() define o que "Jogar
+# novamente" apaga; advance() descarta o que era só da fase que terminou.
+# Valores de widgets continuam em st.session_state (o Streamlit exige);
+# o app os remove ao trocar de fase (ver SESSION_KEYS em transformer_game).
+
+
+class GameState:
+    __slots__ = (
+        "session_id",
+        "phase",
+        "passed",
+        "attempts",
+        "feedback",
+        "entered_phase",
+        "entered_at",
+        "training",
+        "training_polling",
+        "llm_job",
+        "llm_job_started",
+        "llm_result",
+    )
+
+    def __init__(self, start, session_id=None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.llm_job = None
+        self.llm_job_started = None
+        self.llm_result = None
+        self.reset(start)
+
+    def reset(self, start):
+        # Volta ao início do jogo. Mantém a identidade da sessão (telemetria)
+        # e a conversa com a LLM, que fica na barra lateral, fora das fases.
+        self.phase = start
+        self.passed = ()
+        self.attempts = {}
+        self.feedback = False
+        self.entered_phase = None
+        self.entered_at = None
+        self.training = None
+        self.training_polling = False
+
+    def advance(self, phase_id):
+        # Fase atual concluída; objetos dela (treino, aviso de acerto) saem junto
+        self.passed += (self.phase,)
+        self.phase = phase_id
+        self.feedback = False
+        self.training = None
+        self.training_polling = False
+
+    def attempt(self, phase_id):
+        self.attempts[phase_id] = self.attempts.get(phase_id, 0) + 1
+        return self.attempts[phase_id]
+
+    def __repr__(self):
+        campos = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"GameState({campos})"
+
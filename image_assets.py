@@ -0,0 +1,162 @@
+import argparse
+import hashlib
+import io
+import os
+import threading
+from dataclasses import dataclass, replace
+
+# --- Imagens pré-processadas ---
+# Cada imagem de img/ é lida do disco uma única vez. Para cada largura
+# renderizada gera-se uma variante redimensionada (WebP/AVIF), gravada em
+# static/img/ com o hash do conteúdo no nome: a URL muda quando a imagem muda,
+# então o navegador pode guardá-la em cache sem revalidar. Sem static serving,
+# a variante no formato original fica em memória e é enviada como bytes.
+# O Pillow só é importado quando alguma variante precisa ser gerada.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+IMG_DIR = os.path.join(BASE_DIR, "img")
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+STATIC_URL = "/app/static/"
+PIXEL_DENSITY = 2
+
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+    "avif": ("AVIF", {"quality": 60}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True}),
+    "png": ("PNG", {"optimize": True}),
+}
+
+# Erros do Pillow quando falta o codec (build sem AVIF/WebP): KeyError para
+# formato desconhecido no save(), ValueError/OSError para encoder ausente
+ENCODE_ERRORS = (OSError, KeyError, ValueError)
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    name: str
+    fmt: str
+    width: int
+    height: int
+    data: bytes
+    digest: str
+    url: str = None
+
+    @property
+    def filename(self):
+        stem = os.path.splitext(self.name)[0]
+        return f"{stem}-{self.width}w-{self.digest}.{self.fmt}"
+
+
+class ImageAssets:
+    def __init__(self, source_dir=IMG_DIR, static_dir=STATIC_DIR, density=PIXEL_DENSITY):
+        self.source_dir = source_dir
+        self.static_dir = static_dir
+        self.density = density
+        self._sources = {}
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def source(self, name):
+        with self._lock:
+            data = self._sources.get(name)
+            if data is None:
+                with open(os.path.join(self.source_dir, name), "rb") as f:
+                    data = self._sources[name] = f.read()
+            return data
+
+    def preload(self, names=None):
+        for name in names if names is not None else sorted(os.listdir(self.source_dir)):
+            self.source(name)
+
+    def variant(self, name, width, fmt=None, publish=False, density=None):
+        # fmt=None mantém o formato original (JPEG/PNG), que o st.image
+        # envia sem reprocessar; publish grava o arquivo em static/img/.
+        density = density or self.density
+        key = (name, width, fmt, publish, density)
+        with self._lock:
+            cached = self._variants.get(key)
+        if cached is not None:
+            return cached
+
+        variant = self._plan(name, width * density, fmt)
+        path = os.path.join(self.static_dir, "img", variant.filename)
+        if publish and os.path.exists(path):
+            # Já gerada (no build ou por outro processo): nada a codificar
+            variant = replace(variant, url=f"{STATIC_URL}img/{variant.filename}")
+        else:
+            variant = replace(variant, data=self._encode(variant))
+            if publish:
+                self._write(path, variant.data)
+                variant = replace(variant, url=f"{STATIC_URL}img/{variant.filename}")
+        with self._lock:
+            return self._variants.setdefault(key, variant)
+
+    def _open(self, name):
+        from PIL import Image
+
+        return Image.open(io.BytesIO(self.source(name)))
+
+    def _plan(self, name, width, fmt):
+        # Só lê o cabeçalho da imagem. O hash do original + parâmetros identifica
+        # a variante, então outro processo acha o arquivo sem recodificar nada.
+        image = self._open(name)
+        fmt = fmt or ("png" if image.format == "PNG" else "jpeg")
+        target = min(image.width, width)
+        height = round(image.height * target / image.width)
+        params = repr((target, fmt, FORMATS[fmt][1])).encode()
+        digest = hashlib.sha256(self.source(name) + params).hexdigest()[:12]
+        return ImageVariant(name, fmt, target, height, None, digest)
+
+    def _encode(self, variant):
+        from PIL import Image
+
+        image = self._open(variant.name)
+        pil_format, options = FORMATS[variant.fmt]
+        if variant.width != image.width:
+            image = image.resize((variant.width, variant.height), Image.LANCZOS)
+        if pil_format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format=pil_format, **options)
+        return buffer.getvalue()
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sources": len(self._sources),
+                "source_bytes": sum(len(d) for d in self._sources.values()),
+                "variants": len(self._variants),
+                "variant_bytes": sum(len(v.data or b"") for v in self._variants.values()),
+            }
+
+
+def main():
+    # Pré-gera as variantes no build, para a primeira sessão não pagar a codificação
+    parser = argparse.ArgumentParser(description="Gera variantes redimensionadas das imagens de img/")
+    parser.add_argument("--width", type=int, action="append", required=True)
+    parser.add_argument("--format", action="append", choices=["webp", "avif"])
+    args = parser.parse_args()
+
+    assets = ImageAssets()
+    assets.preload()
+    for name in sorted(os.listdir(assets.source_dir)):
+        for width in args.width:
+            for fmt in args.format or ["webp"]:
+                try:
+                    variant = assets.variant(name, width, fmt, publish=True)
+                except ENCODE_ERRORS as e:
+                    print(f"{name} {width}px {fmt}: não codificado ({e!r})")
+                    continue
+                size = os.path.getsize(os.path.join(assets.static_dir, "img", variant.filename))
+                print(f"{variant.url}  {len(assets.source(name))} -> {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
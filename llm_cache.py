@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from contextlib import contextmanager
+
+# --- Cache de respostas da LLM em disco (SQLite) ---
+# Compartilhado entre os processos do Streamlit no mesmo host. A chave é a
+# pergunta normalizada + modelo + parâmetros de amostragem; a expiração
+# combina TTL (created_at) com descarte LRU (last_access).
+
+def normalize_question(question):
+    text = unicodedata.normalize("NFKC", question).casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(" ?!.")
+
+
+def make_key(question, model, params):
+    raw = json.dumps(
+        {"q": normalize_question(question), "model": model, "params": params},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path, max_entries=1000, ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, reply TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0)")
+
+    @contextmanager
+    def _connect(self):
+        # Uma conexão por operação: seguro entre threads e processos
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, question, model, params):
+        key = make_key(question, model, params)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT reply, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                conn.execute("UPDATE stats SET value = value + 1 WHERE name = 'misses'")
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            conn.execute("UPDATE stats SET value = value + 1 WHERE name = 'hits'")
+            return row[0]
+
+    def set(self, question, model, params, reply):
+        key = make_key(question, model, params)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, reply, now, now)
+            )
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            counters["entries"] = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        total = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = counters["hits"] / total if total else 0.0
+        return counters
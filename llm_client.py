@@ -0,0 +1,119 @@
+import json
+import threading
+
+# --- Cliente HTTP da LLM (chat completions compatível com OpenAI) ---
+# requests só é importado na primeira pergunta enviada (get_session), para
+# não pesar no tempo de inicialização do app.
+
+class LLMError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMRateLimited(LLMError):
+    pass
+
+
+class LLMCancelled(LLMError):
+    pass
+
+
+class LLMRateLimitTimeout(LLMError):
+    # O token bucket local não liberou a vez dentro do prazo. Não é um 429 do
+    # servidor: repetir só faria a sessão esperar o prazo de novo.
+    pass
+
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session(pool_maxsize=32):
+    # Sessão única por processo: reaproveita conexões keep-alive (e o
+    # handshake TLS) entre perguntas de todas as sessões do Streamlit.
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def build_payload(question, model, params, stream=False):
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": question.strip()}],
+        **params,
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def _headers(token):
+    return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+
+def _check_status(response):
+    if response.status_code == 200:
+        return
+    response.close()
+    if response.status_code == 429:
+        raise LLMRateLimited("rate limited", 429)
+    raise LLMError(f"unexpected status {response.status_code}", response.status_code)
+
+
+def complete(url, token, question, model, params, timeout=30):
+    response = get_session().post(
+        url, headers=_headers(token), json=build_payload(question, model, params), timeout=timeout
+    )
+    _check_status(response)
+    return response.json()["choices"][0]["message"]["content"]
+
+
+def iter_sse_deltas(response):
+    # Consome o stream SSE ("data: {...}" por linha, terminando em
+    # "data: [DONE]") e devolve apenas o texto de cada delta. Se a conexão
+    # fechar antes do [DONE] ou de um finish_reason, a resposta está cortada:
+    # levanta LLMError em vez de terminar como se estivesse completa.
+    response.encoding = "utf-8"
+    finished = False
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                finished = True
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            if choices[0].get("finish_reason"):
+                finished = True
+            delta = choices[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+    finally:
+        response.close()
+    if not finished:
+        raise LLMError("stream ended before [DONE]")
+
+
+def stream_completion(url, token, question, model, params, timeout=30):
+    # O status é verificado antes de devolver o gerador, para que 429 e
+    # outros erros apareçam antes de qualquer token ser renderizado.
+    response = get_session().post(
+        url,
+        headers=_headers(token),
+        json=build_payload(question, model, params, stream=True),
+        timeout=timeout,
+        stream=True,
+    )
+    _check_status(response)
+    return iter_sse_deltas(response)
@@ -0,0 +1,91 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Executor compartilhado para chamadas à LLM ---
+# Um pool limitado por processo: o script do Streamlit só submete o pedido e
+# guarda o LLMJob no session_state; a resposta é consultada nos reruns.
+
+class ExecutorBusy(Exception):
+    pass
+
+
+class LLMJob:
+    def __init__(self):
+        self.future = None
+        self.cancel_event = threading.Event()
+        self._chunks = []
+
+    def append(self, text):
+        # Chamado pelo worker a cada delta recebido no streaming
+        self._chunks.append(text)
+
+    def partial_text(self):
+        return "".join(self._chunks)
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        # Cancela na fila; se já estiver rodando, o worker para no próximo delta
+        self.cancel_event.set()
+        return self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+
+class LLMExecutor:
+    def __init__(self, max_workers=8, max_pending=64):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        # fn recebe o LLMJob como primeiro argumento (para streaming/cancelamento)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise ExecutorBusy(f"{self._pending} requests pending")
+            self._pending += 1
+            self._submitted += 1
+
+        job = LLMJob()
+        job.future = self._pool.submit(self._run, fn, job, args, kwargs)
+        job.future.add_done_callback(self._on_done)
+        return job
+
+    def _run(self, fn, job, args, kwargs):
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(job, *args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _on_done(self, future):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,88 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from llm_client import LLMRateLimited
+
+# --- Controle de taxa do lado do cliente ---
+# TokenBucket limita as requisições do processo inteiro, retry_with_backoff
+# refaz chamadas que receberam 429 e SingleFlight junta perguntas iguais
+# feitas ao mesmo tempo numa única chamada ao endpoint.
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        # Bloqueia até haver uma ficha; devolve False se o prazo estourar
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - now
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+def retry_with_backoff(fn, retries=4, base_delay=0.5, max_delay=8.0, retry_on=(LLMRateLimited,)):
+    # Backoff exponencial com "full jitter": espera aleatória em [0, base * 2^n]
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except retry_on:
+            if attempt == retries:
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def waiters(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            return call[1] if call else 0
+
+    def do(self, key, fn):
+        # O primeiro a chegar executa fn; os demais esperam o mesmo resultado
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call[1] += 1
+                future = call[0]
+                leader = False
+            else:
+                future = Future()
+                self._calls[key] = [future, 0]
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
@@ -0,0 +1,68 @@
+import math
+import os
+import re
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from attention import softmax
+from positional_encoding import sinusoidal_table
+
+# --- Multi-Head Attention sobre frases digitadas pelo usuário ---
+# Os tokens viram linhas de uma tabela de embeddings compacta (hashing em
+# N_BUCKETS linhas, float16) guardada num .npy e aberta via mmap. Todas as
+# cabeças são calculadas juntas com einsum, no formato [cabeças, seq, seq].
+
+EMBEDDINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "token_embeddings.npy")
+N_BUCKETS = 2048
+D_MODEL = 64
+D_HEAD = 16
+MAX_HEADS = 96
+
+
+def tokenize(sentence):
+    return re.findall(r"\w+|[^\w\s]", sentence)
+
+
+def token_ids(tokens, n_buckets=N_BUCKETS):
+    # crc32 é estável entre processos (ao contrário de hash())
+    return np.array([zlib.crc32(t.casefold().encode("utf-8")) % n_buckets for t in tokens], dtype=np.int64)
+
+
+def build_embedding_table(path=EMBEDDINGS_PATH, n_buckets=N_BUCKETS, d_model=D_MODEL, seed=0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rng = np.random.default_rng(seed)
+    table = rng.standard_normal((n_buckets, d_model)).astype(np.float16)
+    np.save(path, table)
+    return path
+
+
+def load_embedding_table(path=EMBEDDINGS_PATH):
+    if not os.path.exists(path):
+        build_embedding_table(path)
+    return np.load(path, mmap_mode="r")
+
+
+@lru_cache(maxsize=4)
+def head_projections(n_heads=MAX_HEADS, d_model=D_MODEL, d_head=D_HEAD, seed=1):
+    # Projeções fixas por cabeça: W_q e W_k com forma [cabeças, d_model, d_head]
+    rng = np.random.default_rng(seed)
+    # Escala 2/√d_model deixa os padrões nítidos sem saturar todas as cabeças
+    scale = 2 / math.sqrt(d_model)
+    w_q = (rng.standard_normal((n_heads, d_model, d_head)) * scale).astype(np.float32)
+    w_k = (rng.standard_normal((n_heads, d_model, d_head)) * scale).astype(np.float32)
+    return w_q, w_k
+
+
+def attention_weights(table, tokens, n_heads):
+    # Devolve os pesos de atenção [n_heads, seq, seq] de todas as cabeças
+    ids = token_ids(tokens, table.shape[0])
+    d_model = table.shape[1]
+    x = np.asarray(table[ids], dtype=np.float32) + sinusoidal_table(len(tokens), d_model)
+    w_q, w_k = head_projections(MAX_HEADS, d_model, D_HEAD)
+    q = np.einsum("td,hde->hte", x, w_q[:n_heads])
+    k = np.einsum("td,hde->hte", x, w_k[:n_heads])
+    scores = np.einsum("hte,hse->hts", q, k)
+    scores *= 1 / math.sqrt(D_HEAD)
+    return softmax(scores)
@@ -0,0 +1,66 @@
+from functools import lru_cache
+
+import numpy as np
+
+# --- Positional Encoding senoidal (Vaswani et al., 2017) ---
+# PE(pos, 2i) = sin(pos / base^(2i/d)) e PE(pos, 2i+1) = cos(pos / base^(2i/d)),
+# calculado com broadcasting em vez de um laço por elemento.
+
+def _inverse_frequencies(dims, d_model, base):
+    dims = np.asarray(dims)
+    return np.power(float(base), -(dims - dims % 2) / d_model)
+
+
+def encode_positions(positions, d_model, base=10000.0, dims=None, dtype=np.float32):
+    # Calcula a tabela só para as posições (e dimensões) pedidas
+    dims = np.arange(d_model) if dims is None else np.asarray(dims)
+    angles = np.asarray(positions, dtype=np.float64)[:, None] * _inverse_frequencies(dims, d_model, base)[None, :]
+    table = np.where(dims % 2 == 0, np.sin(angles), np.cos(angles))
+    return table.astype(dtype, copy=False)
+
+
+@lru_cache(maxsize=8)
+def sinusoidal_table(max_len, d_model, base=10000.0):
+    table = encode_positions(np.arange(max_len), d_model, base)
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache(maxsize=32)
+def downsampled_columns(max_len, d_model, dims, n_points, base=10000.0):
+    # Só algumas dimensões (tupla dims), O(max_len · len(dims)), cada uma
+    # reduzida por LTTB a uma série (x, y). O cache guarda só essas séries de
+    # até n_points pontos: a tabela de 1M posições é descartada logo depois.
+    columns = encode_positions(np.arange(max_len), d_model, base, dims=dims)
+    positions = np.arange(max_len)
+    series = []
+    for i in range(len(dims)):
+        x, y = lttb(positions, columns[:, i], n_points)
+        x.flags.writeable = y.flags.writeable = False
+        series.append((x, y))
+    return tuple(series)
+
+
+def lttb(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: reduz a série a n_out pontos
+    # preservando a forma visual (picos e vales).
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        bx, by = x[start:end], y[start:end]
+        areas = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(areas))
+        selected[i + 1] = prev
+    return x[selected], y[selected]
@@ -0,0 +1,252 @@
+import atexit
+import bisect
+import contextvars
+import functools
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Perfilamento opcional por rerun ---
+# Desligado por padrão (span() devolve um nullcontext e wrap() devolve a
+# própria função). Com PROFILING=1, cada rerun e cada trecho instrumentado
+# vira um span com duração, agregado em histogramas por (fase, span) e
+# exposto em formato Prometheus (/metrics) e JSONL (/spans.jsonl).
+# Com PROFILING_SAMPLER=1, uma thread amostra a pilha do script durante o
+# rerun; as pilhas dos reruns mais lentos são gravadas no formato "collapsed"
+# (frame;frame;frame contagem), que flamegraph.pl e speedscope leem direto.
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+NO_PHASE = "-"  # fora de um rerun completo (fragmentos, threads de fundo)
+
+_current_phase = contextvars.ContextVar("profiling_phase", default=NO_PHASE)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def cumulative(self):
+        total = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            yield bound, total
+
+
+class StackSampler:
+    # Amostra a pilha de uma thread a cada `interval` segundos
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+
+class Profiler:
+    def __init__(self, enabled=False, sampler=False, out_dir=".cache/profiles", slowest=10, interval=0.005):
+        self.enabled = enabled or sampler
+        self.sampler = sampler
+        self.out_dir = out_dir
+        self.slowest = slowest
+        self.interval = interval
+        self._histograms = {}
+        self._slow = []  # heap mínimo de (segundos, caminho do arquivo)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.environ.get("PROFILING") == "1",
+            sampler=os.environ.get("PROFILING_SAMPLER") == "1",
+            out_dir=os.environ.get("PROFILING_DIR", ".cache/profiles"),
+        )
+
+    def observe(self, phase, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get((phase, name))
+            if histogram is None:
+                histogram = self._histograms[(phase, name)] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def _span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(_current_phase.get(), name, time.perf_counter() - start)
+
+    def span(self, name):
+        return self._span(name) if self.enabled else nullcontext()
+
+    def wrap(self, name, fn):
+        if not self.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self._span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    @contextmanager
+    def rerun(self, phase):
+        # Span "rerun" da fase inteira; spans internos herdam o rótulo da fase
+        if not self.enabled:
+            yield
+            return
+        token = _current_phase.set(phase)
+        sampler = StackSampler(threading.get_ident(), self.interval).start() if self.sampler else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_phase.reset(token)
+            self.observe(phase, "rerun", elapsed)
+            if sampler is not None:
+                self._keep_if_slow(phase, elapsed, sampler.stop())
+
+    def _keep_if_slow(self, phase, seconds, stacks):
+        # Só os `slowest` reruns mais lentos ficam em disco
+        if not stacks:
+            return
+        with self._lock:
+            if len(self._slow) >= self.slowest and seconds <= self._slow[0][0]:
+                return
+            os.makedirs(self.out_dir, exist_ok=True)
+            path = os.path.join(self.out_dir, f"rerun-{phase}-{seconds * 1000:.0f}ms-{time.time_ns()}.folded")
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(f"{stack} {n}\n" for stack, n in stacks.items())
+            heapq.heappush(self._slow, (seconds, path))
+            if len(self._slow) > self.slowest:
+                _, evicted = heapq.heappop(self._slow)
+                try:
+                    os.remove(evicted)
+                except OSError:
+                    pass
+
+    def slowest_profiles(self):
+        with self._lock:
+            return sorted(self._slow, reverse=True)
+
+    def _snapshot(self):
+        with self._lock:
+            return [(phase, name, list(h.cumulative()), h.count, h.sum, h.max)
+                    for (phase, name), h in sorted(self._histograms.items())]
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP app_span_seconds Duração dos spans instrumentados por fase.",
+            "# TYPE app_span_seconds histogram",
+        ]
+        for phase, name, buckets, count, total, _ in self._snapshot():
+            labels = f'phase="{phase}",span="{name}"'
+            for bound, n in buckets:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'app_span_seconds_bucket{{{labels},le="{le}"}} {n}')
+            lines.append(f"app_span_seconds_sum{{{labels}}} {total}")
+            lines.append(f"app_span_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def jsonl(self):
+        now = time.time()
+        return "".join(
+            json.dumps({
+                "ts": now, "phase": phase, "span": name, "count": count, "sum_s": total, "max_s": peak,
+                "buckets": {("+Inf" if b == float("inf") else str(b)): n for b, n in buckets},
+            }) + "\n"
+            for phase, name, buckets, count, total, peak in self._snapshot()
+        )
+
+    def dump_jsonl(self, path=None):
+        path = path or os.path.join(self.out_dir, "spans.jsonl")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.jsonl())
+        return path
+
+
+def start_metrics_server(profiler, port=9464, host="127.0.0.1"):
+    # Servidor HTTP mínimo numa thread: /metrics (Prometheus) e /spans.jsonl
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = profiler.prometheus_text(), "text/plain; version=0.0.4"
+            elif self.path == "/spans.jsonl":
+                body, content_type = profiler.jsonl(), "application/x-ndjson"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="profiling-metrics", daemon=True).start()
+    return server
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+def get_profiler():
+    # Um perfilador por processo, configurado pelas variáveis de ambiente.
+    # Ligado, sobe o servidor de métricas (PROFILING_PORT) e grava o JSONL
+    # dos histogramas ao encerrar o processo.
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                profiler = Profiler.from_env()
+                if profiler.enabled:
+                    try:
+                        start_metrics_server(profiler, int(os.environ.get("PROFILING_PORT", "9464")))
+                    except OSError:
+                        pass  # porta já em uso por outro processo
+                    atexit.register(profiler.dump_jsonl)
+                _profiler = profiler
+    return _profiler
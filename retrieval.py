@@ -0,0 +1,93 @@
+import re
+import unicodedata
+
+import numpy as np
+
+# --- Índice BM25 sobre o conteúdo do próprio jogo ---
+# Construído uma vez; os pesos BM25 ficam numa matriz esparsa em formato
+# CSC (por termo): term_ptr, doc_ids e weights. Uma consulta só soma as
+# colunas dos termos presentes na pergunta.
+
+STOPWORDS = {
+    "a", "as", "o", "os", "um", "uma", "uns", "umas", "de", "da", "das", "do", "dos",
+    "e", "em", "no", "na", "nos", "nas", "por", "para", "pra", "com", "que", "se",
+    "ao", "aos", "qual", "quais", "como", "porque", "por", "ser", "sao", "esta",
+    "isso", "essa", "esse", "ela", "ele", "eu", "me", "mais", "ou", "the", "is",
+}
+
+
+def tokenize(text):
+    # Minúsculas, sem acentos (dₖ vira "dk"), sem stopwords e sem plural simples
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", text):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, passages, k1=1.5, b=0.75):
+        # passages: lista de (titulo, texto)
+        self.passages = list(passages)
+        docs = [tokenize(f"{titulo} {texto}") for titulo, texto in self.passages]
+        self.vocab = {}
+        rows, cols, counts = [], [], []
+        for doc_id, tokens in enumerate(docs):
+            terms, tf = np.unique(
+                [self.vocab.setdefault(t, len(self.vocab)) for t in tokens], return_counts=True
+            )
+            rows.extend([doc_id] * len(terms))
+            cols.extend(terms.tolist())
+            counts.extend(tf.tolist())
+
+        n_docs = len(docs)
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+        counts = np.asarray(counts, dtype=np.float32)
+        doc_len = np.array([len(d) for d in docs], dtype=np.float32)
+        df = np.bincount(cols, minlength=len(self.vocab)).astype(np.float32)
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        norm = k1 * (1 - b + b * doc_len[rows] / max(doc_len.mean(), 1.0))
+        weights = self.idf[cols] * counts * (k1 + 1) / (counts + norm)
+
+        order = np.argsort(cols, kind="stable")
+        self.doc_ids = rows[order]
+        self.weights = weights[order].astype(np.float32)
+        self.term_ptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=len(self.vocab)), out=self.term_ptr[1:])
+        self.n_docs = n_docs
+
+    def scores(self, query):
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        term_ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        for term in term_ids:
+            start, end = self.term_ptr[term], self.term_ptr[term + 1]
+            scores[self.doc_ids[start:end]] += self.weights[start:end]
+        return scores
+
+    def search(self, query, top_k=3):
+        scores = self.scores(query)
+        best = np.argsort(-scores)[:top_k]
+        return [(self.passages[i], float(scores[i])) for i in best if scores[i] > 0]
+
+    def answer(self, query, min_score=2.0, min_coverage=0.6):
+        # Só responde localmente quando o trecho cobre boa parte da pergunta
+        # e tem pontuação alta; caso contrário devolve None (vai para a LLM).
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return None
+        results = self.search(query, top_k=1)
+        if not results:
+            return None
+        (titulo, texto), score = results[0]
+        passage_terms = set(tokenize(f"{titulo} {texto}"))
+        coverage = len(query_terms & passage_terms) / len(query_terms)
+        if score < min_score or coverage < min_coverage:
+            return None
+        return titulo, texto, score
@@ -0,0 +1,93 @@
+import numpy as np
+
+# --- Saturação da softmax em função de dₖ ---
+# Para q e k com entradas N(0, 1), o produto q·k tem variância dₖ: sem
+# dividir por √dₖ, os logits crescem com a dimensão e a softmax vira quase
+# one-hot (entropia → 0, gradiente → 0). Esta varredura mede isso para uma
+# grade de dₖ × comprimento da sequência, com e sem escalonamento, numa
+# conta vetorizada por comprimento n, em blocos de amostras de tamanho fixo:
+# o pico de memória não cresce com o número de amostras pedido.
+#
+# Não é preciso sortear vetores de tamanho dₖ: dado q, os produtos q·kⱼ são
+# independentes com distribuição N(0, ‖q‖²), e ‖q‖² ~ qui-quadrado(dₖ).
+# Sortear ‖q‖ e um z ~ N(0, 1) por chave dá exatamente a mesma distribuição
+# dos scores, com custo que não depende de dₖ.
+
+D_K_GRID = tuple(2 ** i for i in range(13))  # 1 … 4096
+SEQ_LENGTHS = (4, 16, 64)
+SCALINGS = ("sem escalonamento", "÷ √dₖ")
+SATURATION_THRESHOLD = 0.99  # max p acima disso conta como softmax saturada
+SAMPLE_CHUNK = 256
+METRICS = ("entropy", "max_prob", "jacobian_norm", "saturated")
+
+
+def sample_scores(d_k, seq_len, samples, rng, dtype=np.float32):
+    # Logits q·kⱼ de forma (escala, dₖ, amostra, chave), sem preenchimento
+    d_k = np.asarray(d_k, dtype=np.float64)
+    norms = np.sqrt(rng.chisquare(d_k[:, None], size=(len(d_k), samples))).astype(dtype)
+    z = rng.standard_normal((samples, seq_len), dtype=dtype)  # mesmos z para todo dₖ
+    scale = np.stack([np.ones_like(d_k), 1 / np.sqrt(d_k)]).astype(dtype)
+    return (scale[:, :, None, None] * norms[None, :, :, None]) * z
+
+
+def softmax_stats(logits):
+    # Entropia, max p e norma de Frobenius do Jacobiano da softmax, por linha.
+    # J = diag(p) − ppᵀ, então ‖J‖²_F = Σp² − 2Σp³ + (Σp²)²: sem montar n×n.
+    n = logits.shape[-1]
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    e = np.exp(shifted)
+    total = e.sum(axis=-1, keepdims=True)
+    p = e / total
+    entropy = np.log(total[..., 0]) - (p * shifted).sum(axis=-1)
+    p2 = (p * p).sum(axis=-1)
+    p3 = (p * p * p).sum(axis=-1)
+    jacobian = np.sqrt(np.maximum(p2 - 2 * p3 + p2 * p2, 0))
+    max_prob = 1 / total[..., 0]  # o maior termo de e é exp(0) = 1
+    return {
+        "entropy": entropy / np.log(max(n, 2)),  # 1 = uniforme, 0 = one-hot
+        "max_prob": max_prob,
+        "jacobian_norm": jacobian,
+    }
+
+
+def saturation_sweep(d_k=D_K_GRID, seq_lengths=SEQ_LENGTHS, samples=2000, seed=0, chunk=SAMPLE_CHUNK):
+    # Médias sobre as amostras, cada métrica com forma (escala, n, dₖ).
+    # Soma bloco a bloco: no máximo 2 × len(d_k) × chunk × n logits vivos.
+    rng = np.random.default_rng(seed)
+    sums = {name: np.zeros((len(SCALINGS), len(seq_lengths), len(d_k))) for name in METRICS}
+    for i, n in enumerate(seq_lengths):
+        for start in range(0, samples, chunk):
+            stats = softmax_stats(sample_scores(d_k, n, min(chunk, samples - start), rng))
+            stats["saturated"] = stats["max_prob"] > SATURATION_THRESHOLD
+            for name in METRICS:
+                sums[name][:, i] += stats[name].sum(axis=-1)
+    return {
+        "d_k": np.asarray(d_k),
+        "seq_lengths": np.asarray(seq_lengths),
+        "samples": samples,
+        **{name: total / samples for name, total in sums.items()},
+    }
+
+
+def check_against_explicit(d_k=(4, 64, 512), seq_len=8, samples=4000, tolerance=0.03, seed=1):
+    # Confere a varredura contra Q e K sorteados de verdade e o Jacobiano montado
+    rng = np.random.default_rng(seed)
+    sweep = saturation_sweep(d_k, (seq_len,), samples, seed)
+    for i, d in enumerate(d_k):
+        q = rng.standard_normal((samples, 1, d))
+        k = rng.standard_normal((samples, seq_len, d))
+        logits = (q @ np.swapaxes(k, -1, -2))[:, 0]
+        for j, scale in enumerate((1.0, 1 / np.sqrt(d))):
+            stats = softmax_stats(logits * scale)
+            for name in ("entropy", "max_prob"):
+                explicit = stats[name].mean()
+                if abs(explicit - sweep[name][j, 0, i]) > tolerance:
+                    raise ValueError(f"d_k={d} {SCALINGS[j]}: {name} {sweep[name][j, 0, i]:.3f} vs {explicit:.3f}")
+
+    logits = rng.standard_normal((5, seq_len))
+    p = np.exp(logits) / np.exp(logits).sum(axis=-1, keepdims=True)
+    jacobians = np.einsum("bi,ij->bij", p, np.eye(seq_len)) - p[:, :, None] * p[:, None, :]
+    closed = softmax_stats(logits)["jacobian_norm"]
+    if not np.allclose(closed, np.linalg.norm(jacobians, axis=(1, 2))):
+        raise ValueError("closed-form Jacobian norm does not match the explicit Jacobian")
+    return True
@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from batch_worker import BatchWorker
+
+# --- Telemetria de progresso (tentativas, respostas, tempos, uso da LLM) ---
+# O script do Streamlit só enfileira eventos (put_nowait, nunca bloqueia o
+# rerun). Um worker junta lotes e grava num SQLite em modo WAL: os eventos
+# brutos e, na mesma transação, os contadores das tabelas agregadas. A tela
+# de estatísticas lê só as tabelas agregadas, sem varrer os eventos.
+
+PHASE_ENTER = "phase_enter"
+PHASE_COMPLETE = "phase_complete"
+ATTEMPT = "attempt"
+LLM_REQUEST = "llm_request"
+LLM_RESULT = "llm_result"
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS events ("
+    " ts REAL NOT NULL, session TEXT NOT NULL, kind TEXT NOT NULL,"
+    " phase TEXT, value TEXT, correct INTEGER, duration REAL)",
+    "CREATE TABLE IF NOT EXISTS phase_stats ("
+    " phase TEXT PRIMARY KEY, entered INTEGER NOT NULL DEFAULT 0,"
+    " completed INTEGER NOT NULL DEFAULT 0, seconds REAL NOT NULL DEFAULT 0,"
+    " attempts INTEGER NOT NULL DEFAULT 0, correct INTEGER NOT NULL DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS answer_stats ("
+    " phase TEXT NOT NULL, answer TEXT NOT NULL, correct INTEGER NOT NULL,"
+    " count INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (phase, answer))",
+    "CREATE TABLE IF NOT EXISTS llm_stats ("
+    " kind TEXT NOT NULL, source TEXT NOT NULL, count INTEGER NOT NULL DEFAULT 0,"
+    " seconds REAL NOT NULL DEFAULT 0, PRIMARY KEY (kind, source))",
+]
+
+
+class TelemetryStore:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    @contextmanager
+    def _connect(self):
+        # Uma conexão por operação, como no cache de respostas da LLM
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def write_batch(self, events):
+        # Agrega o lote em memória e aplica um UPSERT por chave, não por evento
+        phases = defaultdict(Counter)
+        answers = Counter()
+        llm = defaultdict(Counter)
+        for ts, session, kind, phase, value, correct, duration in events:
+            if kind == PHASE_ENTER:
+                phases[phase]["entered"] += 1
+            elif kind == PHASE_COMPLETE:
+                phases[phase]["completed"] += 1
+                phases[phase]["seconds"] += duration or 0.0
+            elif kind == ATTEMPT:
+                phases[phase]["attempts"] += 1
+                phases[phase]["correct"] += int(bool(correct))
+                answers[(phase, value, int(bool(correct)))] += 1
+            elif kind in (LLM_REQUEST, LLM_RESULT):
+                llm[(kind, value)]["count"] += 1
+                llm[(kind, value)]["seconds"] += duration or 0.0
+
+        with self._connect() as conn:
+            conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", events)
+            conn.executemany(
+                "INSERT INTO phase_stats VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(phase) DO UPDATE SET"
+                " entered = entered + excluded.entered, completed = completed + excluded.completed,"
+                " seconds = seconds + excluded.seconds, attempts = attempts + excluded.attempts,"
+                " correct = correct + excluded.correct",
+                [
+                    (phase, c["entered"], c["completed"], c["seconds"], c["attempts"], c["correct"])
+                    for phase, c in phases.items()
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO answer_stats VALUES (?, ?, ?, ?) ON CONFLICT(phase, answer) DO UPDATE SET"
+                " count = count + excluded.count",
+                [(phase, answer, correct, n) for (phase, answer, correct), n in answers.items()],
+            )
+            conn.executemany(
+                "INSERT INTO llm_stats VALUES (?, ?, ?, ?) ON CONFLICT(kind, source) DO UPDATE SET"
+                " count = count + excluded.count, seconds = seconds + excluded.seconds",
+                [(kind, source, c["count"], c["seconds"]) for (kind, source), c in llm.items()],
+            )
+
+    def phase_stats(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT phase, entered, completed, seconds, attempts, correct FROM phase_stats ORDER BY phase"
+            ).fetchall()
+        return [
+            {
+                "phase": phase,
+                "entered": entered,
+                "completed": completed,
+                "completion_rate": completed / entered if entered else 0.0,
+                "avg_seconds": seconds / completed if completed else 0.0,
+                "attempts": attempts,
+                "attempts_per_completion": attempts / completed if completed else 0.0,
+                "correct_rate": correct / attempts if attempts else 0.0,
+            }
+            for phase, entered, completed, seconds, attempts, correct in rows
+        ]
+
+    def top_wrong_answers(self, limit=5):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT phase, answer, count FROM answer_stats WHERE correct = 0"
+                " ORDER BY count DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+    def llm_stats(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT kind, source, count, seconds FROM llm_stats ORDER BY kind, count DESC").fetchall()
+        return [
+            {"kind": kind, "source": source, "count": count, "avg_seconds": seconds / count if count else 0.0}
+            for kind, source, count, seconds in rows
+        ]
+
+
+class TelemetrySink:
+    def __init__(self, store, max_batch=200, flush_interval=2.0, max_pending=10_000):
+        self.store = store
+        self.errors = 0
+        self.dropped = 0
+        self.written = 0
+        self._worker = BatchWorker(self._write, "telemetry-sink", max_batch, flush_interval, max_pending)
+
+    def record(self, session, kind, phase=None, value=None, correct=None, duration=None):
+        # Fila cheia (disco lento/travado): descarta o evento em vez de bloquear
+        event = (time.time(), session, kind, phase, value, correct, duration)
+        if not self._worker.put(event):
+            self.dropped += 1
+
+    def pending(self):
+        return self._worker.pending()
+
+    def _write(self, batch):
+        try:
+            self.store.write_batch(batch)
+            self.written += len(batch)
+        except Exception:
+            self.errors += 1
+
+    def close(self, timeout=10.0):
+        self._worker.close(timeout)
@@ -0,0 +1,128 @@
+import threading
+
+import numpy as np
+
+from positional_encoding import sinusoidal_table
+
+# --- Treinamento de verdade (em miniatura) para a Fase 5 ---
+# Uma camada de atenção de uma cabeça, treinada com backprop manual e Adam
+# na tarefa "copiar o token anterior": para acertar, cada posição precisa
+# aprender a olhar para a posição vizinha — exatamente o papel da atenção.
+
+class TrainingRun:
+    # Estado compartilhado entre a thread de treino e os reruns da sessão
+    def __init__(self, steps):
+        self.steps = steps
+        self.step = 0
+        self.loss = None
+        self.accuracy = None
+        self.history = []
+        self.error = None
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+
+    def report(self, step, loss, accuracy):
+        with self._lock:
+            self.step = step
+            self.loss = loss
+            self.accuracy = accuracy
+            self.history.append((step, loss, accuracy))
+
+    def snapshot(self):
+        with self._lock:
+            return self.step, self.loss, self.accuracy, list(self.history)
+
+    @property
+    def done(self):
+        return self.finished.is_set()
+
+
+def _softmax(x, axis=-1):
+    x = x - x.max(axis=axis, keepdims=True)
+    e = np.exp(x)
+    return e / e.sum(axis=axis, keepdims=True)
+
+
+def _batch(rng, batch_size, seq_len, vocab):
+    tokens = rng.integers(0, vocab, size=(batch_size, seq_len))
+    targets = np.concatenate([tokens[:, :1], tokens[:, :-1]], axis=1)
+    return tokens, targets
+
+
+def train_tiny_attention(run, vocab=12, seq_len=8, d_model=16, batch_size=64, lr=0.01,
+                         seed=0, report_points=50):
+    rng = np.random.default_rng(seed)
+    scale = 1 / np.sqrt(d_model)
+    params = {
+        "E": rng.normal(0, 0.5, (vocab, d_model)),
+        "Wq": rng.normal(0, scale, (d_model, d_model)),
+        "Wk": rng.normal(0, scale, (d_model, d_model)),
+        "Wv": rng.normal(0, scale, (d_model, d_model)),
+        "Wo": rng.normal(0, scale, (d_model, vocab)),
+    }
+    m = {k: np.zeros_like(p) for k, p in params.items()}
+    v = {k: np.zeros_like(p) for k, p in params.items()}
+    pos = np.asarray(sinusoidal_table(seq_len, d_model), dtype=np.float64)
+    report_every = max(1, run.steps // report_points)
+
+    for step in range(1, run.steps + 1):
+        tokens, targets = _batch(rng, batch_size, seq_len, vocab)
+
+        # Forward
+        X = params["E"][tokens] + pos
+        Q, K, V = X @ params["Wq"], X @ params["Wk"], X @ params["Wv"]
+        A = _softmax(Q @ K.transpose(0, 2, 1) * scale)
+        H = A @ V
+        probs = _softmax(H @ params["Wo"])
+        n = batch_size * seq_len
+        picked = np.take_along_axis(probs, targets[..., None], axis=-1)[..., 0]
+        loss = float(-np.log(picked + 1e-12).mean())
+        accuracy = float((probs.argmax(-1) == targets).mean())
+
+        # Backward
+        dlogits = probs.copy()
+        np.put_along_axis(dlogits, targets[..., None], np.take_along_axis(dlogits, targets[..., None], -1) - 1, -1)
+        dlogits /= n
+        grads = {"Wo": np.einsum("btd,btv->dv", H, dlogits)}
+        dH = dlogits @ params["Wo"].T
+        dA = dH @ V.transpose(0, 2, 1)
+        dV = A.transpose(0, 2, 1) @ dH
+        dS = A * (dA - (dA * A).sum(-1, keepdims=True)) * scale
+        dQ = dS @ K
+        dK = dS.transpose(0, 2, 1) @ Q
+        grads["Wq"] = np.einsum("btd,bte->de", X, dQ)
+        grads["Wk"] = np.einsum("btd,bte->de", X, dK)
+        grads["Wv"] = np.einsum("btd,bte->de", X, dV)
+        dX = dQ @ params["Wq"].T + dK @ params["Wk"].T + dV @ params["Wv"].T
+        grads["E"] = np.zeros_like(params["E"])
+        np.add.at(grads["E"], tokens, dX)
+
+        # Adam
+        for k in params:
+            m[k] = 0.9 * m[k] + 0.1 * grads[k]
+            v[k] = 0.999 * v[k] + 0.001 * grads[k] ** 2
+            m_hat = m[k] / (1 - 0.9 ** step)
+            v_hat = v[k] / (1 - 0.999 ** step)
+            params[k] -= lr * m_hat / (np.sqrt(v_hat) + 1e-8)
+
+        # Progresso a cada report_every passos (~report_points pontos na curva,
+        # qualquer que seja a velocidade da máquina) e sempre no último
+        if step % report_every == 0 or step == run.steps:
+            run.report(step, loss, accuracy)
+
+    return params
+
+
+def start_training(executor, steps=300, **kwargs):
+    run = TrainingRun(steps)
+
+    def task():
+        try:
+            train_tiny_attention(run, **kwargs)
+        except Exception as e:
+            run.error = e
+        finally:
+            run.finished.set()
+
+    executor.submit(task)
+    return run
@@ -0,0 +1,108 @@
+import numpy as np
+
+# --- Calculadora de custo do Transformer (encoder-decoder) ---
+# Todas as funções aceitam escalares ou arrays NumPy (com broadcasting), então
+# uma varredura de milhares de configurações é uma única conta vetorizada.
+
+# Linhas do artigo (Tabela 3 e Tabela 2 de Vaswani et al., 2017).
+# Treino: 25k tokens de origem + 25k de destino por lote.
+PAPER_CONFIGS = {
+    "Transformer (base)": {
+        "layers": 6, "d_model": 512, "heads": 8, "d_ff": 2048,
+        "vocab": 37000, "steps": 100_000, "batch_tokens": 50_000,
+        "paper_params": 65e6, "paper_train_flops": 3.3e18,
+    },
+    "Transformer (big)": {
+        "layers": 6, "d_model": 1024, "heads": 16, "d_ff": 4096,
+        "vocab": 37000, "steps": 300_000, "batch_tokens": 50_000,
+        "paper_params": 213e6, "paper_train_flops": 2.3e19,
+    },
+}
+
+
+def _layer_params(d_model, d_ff, attention_blocks, layer_norms):
+    attention = attention_blocks * (4 * d_model * d_model + 4 * d_model)
+    ffn = 2 * d_model * d_ff + d_ff + d_model
+    return attention + ffn + layer_norms * 2 * d_model
+
+
+def parameter_count(layers, d_model, d_ff, vocab=37000):
+    # Encoder: 1 atenção + FFN + 2 LayerNorm; decoder: 2 atenções + FFN + 3 LayerNorm.
+    # Embeddings compartilhados entre entrada, saída e pré-softmax (como no artigo).
+    encoder = layers * _layer_params(d_model, d_ff, 1, 2)
+    decoder = layers * _layer_params(d_model, d_ff, 2, 3)
+    return encoder + decoder + vocab * d_model
+
+
+def forward_flops_per_token(layers, d_model, d_ff, seq_len, vocab=37000):
+    # 2 FLOPs por parâmetro multiplicado + os produtos QKᵀ e AV, que crescem
+    # com o comprimento (3 atenções por par encoder/decoder).
+    non_embedding = parameter_count(layers, d_model, d_ff, vocab=0)
+    attention_scores = 3 * layers * 2 * 2 * seq_len * d_model
+    output_projection = 2 * vocab * d_model
+    return 2 * non_embedding + attention_scores + output_projection
+
+
+def training_flops(layers, d_model, d_ff, seq_len, tokens, vocab=37000):
+    # Forward + backward ≈ 3 × forward
+    return 3 * forward_flops_per_token(layers, d_model, d_ff, seq_len, vocab) * tokens
+
+
+def activation_memory_bytes(layers, d_model, heads, seq_len, batch, bytes_per_value=2):
+    # Estimativa por camada de Korthikanti et al. (2022), sem recomputação:
+    # s·b·d·(34 + 5·a·s/d); decoder conta com ~1,5× (atenção cruzada).
+    per_layer = seq_len * batch * d_model * (34 + 5 * heads * seq_len / d_model) * bytes_per_value / 2
+    return 2.5 * layers * per_layer
+
+
+def kv_cache_bytes(layers, d_model, seq_len, batch, bytes_per_value=2):
+    # K e V de cada camada do decoder, para cada posição já gerada
+    return 2 * layers * seq_len * batch * d_model * bytes_per_value
+
+
+def sweep(layers, d_model, heads, d_ff_mult, seq_len, batch, vocab=37000, tokens=5e9):
+    # Produto cartesiano das faixas, avaliado de uma vez com arrays NumPy
+    grid = np.meshgrid(
+        np.asarray(layers), np.asarray(d_model), np.asarray(heads),
+        np.asarray(d_ff_mult), np.asarray(seq_len), np.asarray(batch), indexing="ij",
+    )
+    L, D, H, M, S, B = (g.ravel().astype(np.float64) for g in grid)
+    F = D * M
+    return {
+        "layers": L, "d_model": D, "heads": H, "d_ff": F, "seq_len": S, "batch": B,
+        "params": parameter_count(L, D, F, vocab),
+        "train_flops": training_flops(L, D, F, S, tokens, vocab),
+        "inference_flops_per_token": forward_flops_per_token(L, D, F, S, vocab),
+        "activation_bytes": activation_memory_bytes(L, D, H, S, B),
+        "kv_cache_bytes": kv_cache_bytes(L, D, S, B),
+    }
+
+
+def paper_comparison(seq_len=25):
+    # Compara a calculadora com as linhas do artigo. FLOPs do artigo foram
+    # estimados por tempo × GPUs × FLOPS sustentados, então só a ordem de
+    # grandeza deve coincidir; parâmetros devem bater em poucos %.
+    rows = []
+    for name, cfg in PAPER_CONFIGS.items():
+        tokens = cfg["steps"] * cfg["batch_tokens"]
+        params = parameter_count(cfg["layers"], cfg["d_model"], cfg["d_ff"], cfg["vocab"])
+        flops = training_flops(cfg["layers"], cfg["d_model"], cfg["d_ff"], seq_len, tokens, cfg["vocab"])
+        rows.append({
+            "model": name,
+            "params": params,
+            "paper_params": cfg["paper_params"],
+            "params_ratio": params / cfg["paper_params"],
+            "train_flops": flops,
+            "paper_train_flops": cfg["paper_train_flops"],
+            "flops_ratio": flops / cfg["paper_train_flops"],
+        })
+    return rows
+
+
+def check_against_paper(params_tolerance=0.05, flops_factor=2.0):
+    for row in paper_comparison():
+        if abs(row["params_ratio"] - 1) > params_tolerance:
+            raise ValueError(f"{row['model']}: params {row['params']:.3g} vs paper {row['paper_params']:.3g}")
+        if not 1 / flops_factor <= row["flops_ratio"] <= flops_factor:
+            raise ValueError(f"{row['model']}: FLOPs {row['train_flops']:.3g} vs paper {row['paper_train_flops']:.3g}")
+    return True
@@ -1,30 +1,91 @@
-import streamlit as st
-import time
+import atexit
 import datetime
+import hmac
+import html
 import os
+import time
+
 import numpy as np
-import matplotlib.pyplot as plt
-import requests
+import streamlit as st
+
+from game_content import DEFAULT_PACK_PATH, ContentStore
+from game_state import GameState
+from profiling import get_profiler
+
+CONTENT_PACK_PATH = os.environ.get("CONTENT_PACK_PATH", DEFAULT_PACK_PATH)
+
+@st.cache_resource
+def get_content_store():
+    # Registro imutável das fases, compartilhado pelo processo. O pack é
+    # relido só quando o arquivo muda (hot reload sem reiniciar o worker).
+    return ContentStore(CONTENT_PACK_PATH, PHASE_VIEWS)
+
+def profiled_fragment(fn=None, *, run_every=None):
+    # st.fragment com um span por execução (só quando PROFILING=1)
+    if fn is None:
+        return lambda f: profiled_fragment(f, run_every=run_every)
+    return st.fragment(get_profiler().wrap(f"fragment.{fn.__name__}", fn), run_every=run_every)
+
+def advance_to(phase_id):
+    complete_phase()
+    current_game().advance(phase_id)
+    evict_widget_state()
+    st.rerun()
 
 # --- Inicialização de Estado ---
-def init_state():
-    st.session_state.setdefault("game_state", "menu")
-    for key in [
-        "phase1_passed", "phase2_passed", "phase3_passed", "phase4_passed",
-        "show_phase1_feedback", "show_phase2_feedback", "show_phase3_feedback", "show_phase4_feedback"
-    ]:
-        st.session_state.setdefault(key, False)
-    for key in ["p1_attempts", "p2_attempts", "p3_attempts", "p4_attempts"]:
-        st.session_state.setdefault(key, 0)
-
-init_state()
+# Fora o GameState, só a pergunta digitada no sidebar sobrevive à troca de fase
+SESSION_KEYS = ("game", "hf_chat_user_question")
+
+def init_state(registry):
+    if "game" not in st.session_state:
+        st.session_state.game = GameState(registry.start)
+    elif registry.phase(st.session_state.game.phase) is None:
+        # O content pack recarregado não tem mais a fase desta sessão:
+        # recomeça do início em vez de ficar presa numa tela vazia
+        st.session_state.game.reset(registry.start)
+        evict_widget_state()
+
+def current_game():
+    return st.session_state.game
+
+def evict_widget_state():
+    # Valores de widgets da fase que terminou; o Streamlit só os descartaria
+    # no fim do próximo rerun, e o mapeamento chave→id ficaria para sempre.
+    for key in list(st.session_state.keys()):
+        if key not in SESSION_KEYS:
+            del st.session_state[key]
 
 # --- Logs de Feedback ---
-from github import Github
-import datetime
-import streamlit as st
+from feedback_log import FeedbackLog
+from feedback_sink import FeedbackSink, GithubBackend, LocalFileBackend
+
+LOCAL_FEEDBACK_PATH = os.environ.get("FEEDBACK_LOG_PATH", "feedbacks/log.txt")
+FEEDBACK_LOG_MAX_BYTES = int(os.environ.get("FEEDBACK_LOG_MAX_BYTES", 1 << 20))
+FEEDBACK_INDEX_PATH = os.environ.get("FEEDBACK_INDEX_PATH", ".cache/feedback_index.sqlite3")
+
+@st.cache_resource
+def get_feedback_sink():
+    # Uma única fila por processo, compartilhada entre todas as sessões.
+    # Sem credenciais do GitHub, grava no arquivo local (FEEDBACK_LOG_PATH);
+    # com elas, o arquivo local recebe uma cópia de cada lote, que é o que
+    # a tela ?view=feedback indexa e o que sobra se o GitHub falhar.
+    local = LocalFileBackend(LOCAL_FEEDBACK_PATH, max_bytes=FEEDBACK_LOG_MAX_BYTES)
+    try:
+        backend = GithubBackend(
+            st.secrets["GITHUB_TOKEN"], st.secrets["REPO_NAME"], st.secrets["FILE_PATH"]
+        )
+        local_copy = local
+    except Exception:
+        backend, local_copy = local, None
+    backend.write_batch = get_profiler().wrap("feedback.write_batch", backend.write_batch)
+    sink = FeedbackSink(backend, local_copy=local_copy)
+    atexit.register(sink.close)
+    return sink
 
-import html
+@st.cache_resource
+def get_feedback_log():
+    # Índice do log local; cada consulta lê só o que foi acrescentado desde a última
+    return FeedbackLog(LOCAL_FEEDBACK_PATH, FEEDBACK_INDEX_PATH)
 
 def log_feedback(feedback_text):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -34,21 +95,42 @@ def log_feedback(feedback_text):
     
     full_text = f"[{timestamp}] {safe_text}\n"
 
-    token = st.secrets["GITHUB_TOKEN"]
-    repo_name = st.secrets["REPO_NAME"]
-    file_path = st.secrets["FILE_PATH"]
+    get_feedback_sink().submit(full_text)
 
-    g = Github(token)
-    repo = g.get_repo(repo_name)
+    st.success("✅ Feedback recebido! Ele será salvo no repositório privado em instantes.")
 
-    try:
-        contents = repo.get_contents(file_path)
-        new_content = contents.decoded_content.decode() + full_text
-        repo.update_file(file_path, "append feedback", new_content, contents.sha)
-    except Exception:
-        repo.create_file(file_path, "create feedback log", full_text)
+# --- Telemetria ---
+from telemetry import (
+    ATTEMPT, LLM_REQUEST, LLM_RESULT, PHASE_COMPLETE, PHASE_ENTER, TelemetrySink, TelemetryStore,
+)
+
+TELEMETRY_DB_PATH = os.environ.get("TELEMETRY_DB_PATH", ".cache/telemetry.sqlite3")
+
+@st.cache_resource
+def get_telemetry():
+    # Uma fila por processo; o worker grava em lotes no SQLite (WAL)
+    sink = TelemetrySink(TelemetryStore(TELEMETRY_DB_PATH))
+    atexit.register(sink.close)
+    return sink
 
-    st.success("✅ Feedback salvo com sucesso no repositório privado!")
+def track(kind, **fields):
+    get_telemetry().record(current_game().session_id, kind, **fields)
+
+def record_attempt(phase_id, answer, correct):
+    current_game().attempt(phase_id)
+    track(ATTEMPT, phase=phase_id, value=answer, correct=correct)
+
+def enter_phase(phase_id):
+    # Chamado a cada rerun; só registra quando a fase muda
+    game = current_game()
+    if game.entered_phase != phase_id:
+        game.entered_phase, game.entered_at = phase_id, time.time()
+        track(PHASE_ENTER, phase=phase_id)
+
+def complete_phase():
+    game = current_game()
+    if game.entered_phase is not None:
+        track(PHASE_COMPLETE, phase=game.entered_phase, duration=time.time() - game.entered_at)
 
 # --- Função lateral de bug/sugestão ---
 def report_bug_section():
@@ -62,14 +144,160 @@ def report_bug_section():
             else:
                 st.sidebar.warning("Por favor, escreva algo antes de enviar.")
 
+# --- Imagens ---
+from image_assets import ENCODE_ERRORS, ImageAssets
+
+IMAGE_FORMAT = os.environ.get("IMAGE_ASSET_FORMAT", "webp")
+SIDEBAR_IMAGE_WIDTH = 300
+CENTER_COLUMN_WIDTH = 352  # coluna do meio de st.columns([1, 2, 1])
+
+@st.cache_resource
+def get_image_assets():
+    # Originais lidos do disco uma vez por processo; variantes geradas no primeiro uso
+    assets = ImageAssets()
+    assets.preload()
+    return assets
+
+def image_source(name, width):
+    # Com static serving: URL com hash de uma variante WebP/AVIF (cache do navegador).
+    # Sem: bytes JPEG/PNG já na largura exibida, que o st.image envia sem reprocessar.
+    assets = get_image_assets()
+    with get_profiler().span("image"):
+        if st.get_option("server.enableStaticServing"):
+            try:
+                return assets.variant(name, width, IMAGE_FORMAT, publish=True).url
+            except ENCODE_ERRORS:
+                pass  # Pillow sem suporte a AVIF/WebP: segue com o JPEG/PNG original
+        return assets.variant(name, width, density=1).data
+
 # --- Função lateral de llms ---
 
-from huggingface_hub import InferenceClient
-import requests
+import llm_client
+from llm_cache import ResponseCache, make_key
+from llm_executor import ExecutorBusy, LLMExecutor
+from llm_ratelimit import SingleFlight, TokenBucket, retry_with_backoff
+from retrieval import BM25Index
+
+LLM_API_URL = "https://router.huggingface.co/together/v1/chat/completions"
+LLM_MODEL = "Qwen/Qwen2.5-7B-Instruct-Turbo"
+LLM_PARAMS = {"temperature": 0.7, "max_tokens": 300}
+LLM_CACHE_PATH = ".cache/llm_responses.sqlite3"
+LLM_STREAM = True
+LLM_MAX_WORKERS = 8
+LLM_MAX_PENDING = 64
+LLM_POLL_SECONDS = 0.5
+LLM_RATE_PER_SECOND = 2.0
+LLM_RATE_BURST = 5
+LLM_RATE_WAIT_SECONDS = 20
+
+@st.cache_resource
+def get_llm_cache():
+    # Cache em disco compartilhado pelos workers
+    return ResponseCache(LLM_CACHE_PATH)
+
+@st.cache_resource(max_entries=2)
+def get_retrieval_index(digest, _knowledge_base):
+    # Construído uma vez por versão do content pack (textos das fases e do resumo)
+    return BM25Index(_knowledge_base)
+
+@st.cache_resource
+def get_llm_executor():
+    # Pool único por processo
+    return LLMExecutor(max_workers=LLM_MAX_WORKERS, max_pending=LLM_MAX_PENDING)
+
+@st.cache_resource
+def get_llm_rate_limiter():
+    # Compartilhado por todas as sessões do processo
+    return TokenBucket(LLM_RATE_PER_SECOND, LLM_RATE_BURST), SingleFlight()
+
+def fetch_llm_reply(job, api_url, token, question, key):
+    bucket, single_flight = get_llm_rate_limiter()
+
+    def attempt():
+        if not bucket.acquire(timeout=LLM_RATE_WAIT_SECONDS):
+            raise llm_client.LLMRateLimitTimeout("local rate limit")
+        if not LLM_STREAM:
+            return llm_client.complete(api_url, token, question, LLM_MODEL, LLM_PARAMS)
+        for delta in llm_client.stream_completion(api_url, token, question, LLM_MODEL, LLM_PARAMS):
+            # Só interrompe se nenhuma outra sessão estiver esperando esta resposta
+            if job.cancelled and single_flight.waiters(key) == 0:
+                raise llm_client.LLMCancelled("cancelled")
+            job.append(delta)
+        return job.partial_text()
+
+    with get_profiler().span("llm.request"):
+        return retry_with_backoff(attempt)
+
+def run_llm_request(job, api_url, token, question):
+    # Executa numa thread do pool, fora do script do Streamlit. Perguntas
+    # iguais em andamento em outras sessões compartilham a mesma chamada.
+    _, single_flight = get_llm_rate_limiter()
+    key = make_key(question, LLM_MODEL, LLM_PARAMS)
+    reply = single_flight.do(key, lambda: fetch_llm_reply(job, api_url, token, question, key))
+    # Só chega aqui com a resposta completa: stream cortado ou cancelado
+    # levanta exceção antes, e nada parcial vai para o cache
+    get_llm_cache().set(question, LLM_MODEL, LLM_PARAMS, reply)
+    return reply
+
+def llm_error_message(exc):
+    if isinstance(exc, (llm_client.LLMRateLimited, llm_client.LLMRateLimitTimeout)):
+        return "⚠️ Ops, atingimos o limite de requests para o modelo!"
+    if isinstance(exc, llm_client.LLMError):
+        return "❌ Ocorreu um erro inesperado ao consultar a LLM."
+    return "❌ Ocorreu um erro técnico ao tentar se conectar à LLM."
+
+def show_llm_reply(reply):
+    st.success("📘 Resposta da LLM:")
+    st.markdown(f"> {reply.strip()}")
+
+def llm_job_status():
+    # Roda como fragmento: enquanto houver pedido em andamento, só este
+    # trecho do sidebar é reexecutado a cada LLM_POLL_SECONDS.
+    game = current_game()
+    job = game.llm_job
+    if job is None:
+        result = game.llm_result
+        if result is not None:
+            kind, text = result
+            if kind == "reply":
+                show_llm_reply(text)
+            elif kind == "local":
+                titulo, trecho = text
+                st.success(f"📗 Resposta do próprio jogo ({titulo}):")
+                st.markdown(trecho)
+            else:
+                st.error(text)
+        return
+
+    if job.done():
+        game.llm_job = None
+        duracao = time.time() - game.llm_job_started
+        if job.future.cancelled() or job.cancelled:
+            game.llm_result = None
+            track(LLM_RESULT, value="cancelled", duration=duracao)
+        elif job.future.exception() is not None:
+            game.llm_result = ("error", llm_error_message(job.future.exception()))
+            track(LLM_RESULT, value="error", duration=duracao)
+        else:
+            game.llm_result = ("reply", job.future.result())
+            track(LLM_RESULT, value="reply", duration=duracao)
+        st.rerun()
+
+    fila = get_llm_executor().metrics()["queued"]
+    st.info(f"⏳ Consultando a LLM... ({fila} pedido(s) na fila)" if fila else "⏳ Consultando a LLM...")
+    partial = job.partial_text()
+    if partial:
+        st.markdown(f"> {partial}")
+    if st.button("Cancelar pergunta", key="hf_chat_cancel"):
+        job.cancel()
+        game.llm_job = None
+        track(LLM_RESULT, value="cancelled", duration=time.time() - game.llm_job_started)
+        game.llm_result = None
+        st.rerun()
 
 def llm_sidebar_consultation():
      # 🔼 Imagem no topo do sidebar
-    st.sidebar.image("img/image_sidebar.jpg", use_container_width=True)
+    st.sidebar.image(image_source("image_sidebar.jpg", SIDEBAR_IMAGE_WIDTH), use_container_width=True)
 
     # 🔻 Linha divisória abaixo da imagem
     st.sidebar.markdown("---")
@@ -79,139 +307,165 @@ def llm_sidebar_consultation():
 
     user_question = st.sidebar.text_area("Digite sua dúvida abaixo:", key="hf_chat_user_question")
 
+    game = current_game()
     if st.sidebar.button("Enviar pergunta", key="hf_chat_submit") and user_question.strip():
-        with st.spinner("Consultando a LLM..."):
+        previous_job, game.llm_job = game.llm_job, None
+        if previous_job is not None:
+            previous_job.cancel()
+
+        registry = get_content_store().current()
+        local_answer = get_retrieval_index(registry.digest, registry.knowledge_base).answer(user_question)
+        cached_reply = None if local_answer else get_llm_cache().get(user_question, LLM_MODEL, LLM_PARAMS)
+        if local_answer is not None:
+            titulo, trecho, _ = local_answer
+            game.llm_result = ("local", (titulo, trecho))
+            track(LLM_REQUEST, value="local")
+        elif cached_reply is not None:
+            game.llm_result = ("reply", cached_reply)
+            track(LLM_REQUEST, value="cache")
+        else:
             try:
                 hf_token = st.secrets["HF_TOKEN"]
-                headers = {
-                    "Authorization": f"Bearer {hf_token}",
-                    "Content-Type": "application/json"
-                }
-
-                API_URL = "https://router.huggingface.co/together/v1/chat/completions"
-                payload = {
-                    "model": "Qwen/Qwen2.5-7B-Instruct-Turbo",
-                    "messages": [
-                        {"role": "user", "content": user_question.strip()}
-                    ],
-                    "temperature": 0.7,
-                    "max_tokens": 300
-                }
-
-                response = requests.post(API_URL, headers=headers, json=payload, timeout=30)
-
-                if response.status_code == 200:
-                    result = response.json()
-                    reply = result["choices"][0]["message"]["content"]
-                    st.sidebar.success("📘 Resposta da LLM:")
-                    st.sidebar.markdown(f"> {reply.strip()}")
-                elif response.status_code == 429:
-                    st.sidebar.error("⚠️ Ops, atingimos o limite de requests para o modelo!")
-                else:
-                    st.sidebar.error("❌ Ocorreu um erro inesperado ao consultar a LLM.")
-
+                # LLM_API_URL nos secrets permite apontar para um mock local
+                api_url = st.secrets.get("LLM_API_URL", LLM_API_URL)
+                game.llm_job = get_llm_executor().submit(
+                    run_llm_request, api_url, hf_token, user_question
+                )
+                game.llm_job_started = time.time()
+                game.llm_result = None
+                track(LLM_REQUEST, value="remote")
+            except ExecutorBusy:
+                game.llm_result = ("error", "⚠️ Muitas perguntas em andamento! Tente novamente em instantes.")
+                track(LLM_REQUEST, value="busy")
             except Exception as e:
-                st.sidebar.error("❌ Ocorreu um erro técnico ao tentar se conectar à LLM.")
+                game.llm_result = ("error", llm_error_message(e))
+                track(LLM_REQUEST, value="error")
+
+    polling = game.llm_job is not None
+    with st.sidebar:
+        profiled_fragment(llm_job_status, run_every=LLM_POLL_SECONDS if polling else None)()
 
     # 🔽 Adiciona separador entre a LLM e a caixa de feedback de erro conceitual
     st.sidebar.markdown("---")
 
 # --- Função da imagem inicial ---
 def sidebar_inicial():
-    st.sidebar.image("img/image_sidebar.jpg", use_container_width=True)
+    st.sidebar.image(image_source("image_sidebar.jpg", SIDEBAR_IMAGE_WIDTH), use_container_width=True)
     st.sidebar.markdown("---")
 
 # --- Fase 1: Mini-game de Montagem do Transformer ---
-def phase1_architecture():
-    st.header("Fase 1: A Arquitetura Fundacional (Encoder-Decoder) 🏗️")
-
-    st.markdown("""
-> 📘 **Conceito-chave do artigo**  
-> "Nosso modelo segue a arquitetura geral do transformador como uma pilha de camadas de codificador e decodificador."  
-> — *Vaswani et al., 2017*
-
-A arquitetura Encoder-Decoder permite que o modelo processe a entrada por completo antes de gerar a saída, otimizando tarefas como tradução, resumo e question answering.
-    """)
-
-    st.write("Arraste os blocos abaixo para a ordem correta da arquitetura Transformer: da entrada até a saída.")
-
-    componentes = [
-        "Mecanismo de Atenção",
-        "Camada de Saída",
-        "Decoder",
-        "Encoder",
-        "Embedding"
-    ]
-
-    ordem_correta = [
-        "Embedding", "Encoder", "Mecanismo de Atenção", "Decoder", "Camada de Saída"
-    ]
-
-    dicas = [
-        "Posição 1 - Transforma cada palavra em um vetor numérico compreensível pela IA.",
-        "Posição 2 - Processa a frase de entrada e gera uma representação contextualizada.",
-        "Posição 3 - Decide quais palavras são mais importantes umas para as outras.",
-        "Posição 4 - Gera a frase de saída, com base na atenção e no encoder.",
-        "Posição 5 - Traduz a saída do decoder para palavras compreensíveis."
-    ]
+from decoding import TinyDecoder, generate
+
+@st.cache_resource
+def get_tiny_decoder():
+    return TinyDecoder()
+
+# Fragmento: mudar uma escolha reexecuta só a montagem, não a página inteira
+@profiled_fragment
+def phase1_assembly(fase):
+    montagem = fase.data["assembly"]
+    opcoes = ("⬇️ Escolha",) + montagem["components"]
 
     escolhas = []
-    for i in range(len(ordem_correta)):
-        st.markdown(dicas[i])
-        escolha = st.selectbox(f"Escolha para a posição {i + 1}", ["⬇️ Escolha"] + componentes, key=f"fase1_{i}")
+    for i, dica in enumerate(montagem["hints"]):
+        st.markdown(dica)
+        escolha = st.selectbox(f"Escolha para a posição {i + 1}", opcoes, key=f"fase1_{i}")
         escolhas.append(escolha)
 
     if st.button("Verificar Ordem"):
-        if escolhas == ordem_correta:
-            st.session_state.phase1_passed = True
-            st.session_state.show_phase1_feedback = True
+        correta = tuple(escolhas) == montagem["answer"]
+        record_attempt(fase.id, " → ".join(escolhas), correta)
+        if correta:
+            current_game().feedback = True
             st.rerun()
         else:
-            st.error("❌ Ainda não está certo! Tente organizar os blocos na sequência lógica.")
-
-    if st.session_state.get("show_phase1_feedback", False):
-        st.success("✅ Correto! Essa é a ordem de processamento do Transformer.")
-        st.image("img/transformer.png", width=300, caption="Arquitetura do Transformer: Encoder-Decoder com Atenção")
-        if st.button("Avançar para Fase 2 ➡️", key="p1_advance_button"):
-            st.session_state.game_state = "phase2"
-            st.session_state.show_phase1_feedback = False
-            st.rerun()
+            st.error(montagem["error"])
 
-    st.markdown("""
-> 🔬 **Além do artigo**  
-> Modelos como **T5**, **BART** e muitos sistemas modernos de tradução neural usam variantes dessa arquitetura.  
-> A separação clara entre codificação e decodificação facilita o **aprendizado transferido (transfer learning)**, a modularização e a adaptação para tarefas distintas — como sumarização, diálogo e até geração de código.
-    """)
+    if current_game().feedback:
+        st.success(montagem["success"])
+        st.image(image_source("transformer.png", 300), width=300, caption=montagem.get("image_caption"))
+        if st.button(fase.advance_label, key="p1_advance_button"):
+            advance_to(fase.next)
 
-    llm_sidebar_consultation()
-    report_bug_section()
+@profiled_fragment
+def phase1_decoding_panel():
+    st.markdown("O Decoder gera um token por vez, e cada token novo precisa olhar para todos os anteriores. Sem **cache de chaves/valores (KV-cache)**, todo o prefixo é reprocessado a cada passo; com o cache, só o token novo é calculado.")
 
+    with st.form("fase1_decoding_form"):
+        n_tokens = st.select_slider("Tokens a gerar", options=[32, 64, 128, 256, 512], value=128, key="fase1_decoding_n")
+        gerar = st.form_submit_button("Gerar com e sem cache ⚙️")
 
-# --- Fase 2 ---
-def phase2_scaled_dot_product_attention():
-    st.header("Fase 2: Corrida de Vetores e Escalonamento 🎯")
+    if not gerar:
+        return
 
-    st.markdown("""
-> 📘 **Conceito-chave do artigo**  
-> "Utilizamos atenção por produto escalar escalonado, que é rápida e eficiente em termos de espaço computacional."  
-> — *Vaswani et al., 2017*
+    modelo = get_tiny_decoder()
+    prompt = list(range(1, 9))
+    with st.spinner("Gerando tokens..."):
+        _, tempos_sem_cache, _ = generate(modelo, prompt, n_tokens, use_cache=False)
+        _, tempos_com_cache, cache = generate(modelo, prompt, n_tokens, use_cache=True)
 
-A divisão por √dₖ evita que os valores da softmax se tornem extremos, preservando gradientes úteis para aprendizado. Essa operação é fundamental para a estabilidade da rede durante o treinamento.
-    """)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Sem cache", f"{n_tokens / sum(tempos_sem_cache):,.0f} tokens/s")
+    col2.metric("Com KV-cache", f"{n_tokens / sum(tempos_com_cache):,.0f} tokens/s")
+    col3.metric("Cache por token", f"{cache.bytes_per_token() / 1024:.1f} KB")
 
-    with st.expander("🤔 O que são Q, K e dₖ?"):
-        st.markdown("""
-- **Q (Query - Consulta):** Representa o vetor da palavra que está buscando contexto.  
-- **K (Key - Chave):** Representa as palavras candidatas a fornecer esse contexto.  
-- **dₖ (dimensão da chave):** Tamanho dos vetores Q e K.  
-- Se dₖ for grande, os produtos Q·K podem saturar a softmax. Por isso escalonamos.
-        """)
-        st.markdown("A fórmula da atenção é:")
-        st.latex(r"Attention(Q, K, V) = \text{softmax}\left(\frac{QK^T}{\sqrt{d_k}}\right)V")
+    posicoes = np.arange(len(prompt), len(prompt) + n_tokens)
+    st.caption("Tempo de cada passo (ms) conforme a sequência cresce")
+    st.line_chart({
+        "Sem cache": np.array(tempos_sem_cache) * 1000,
+        "Com KV-cache": np.array(tempos_com_cache) * 1000,
+    }, height=200)
+
+    # Memória do passo: sem cache, os scores n×n de todas as cabeças e camadas;
+    # com cache, as K/V já guardadas (o buffer é pré-alocado uma vez).
+    itemsize = 4
+    memoria_sem_cache = modelo.n_layers * modelo.n_heads * posicoes ** 2 * itemsize
+    memoria_com_cache = (posicoes + 1) * cache.bytes_per_token()
+    st.caption("Memória usada no passo (KB)")
+    st.line_chart({
+        "Sem cache (scores n×n)": memoria_sem_cache / 1024,
+        "Com KV-cache (K/V acumulados)": memoria_com_cache / 1024,
+    }, height=200)
+
+def phase1_architecture(fase):
+    st.header(fase.title)
+
+    st.markdown(fase.md("conceito"))
+
+    st.write(fase.md("instrucoes"))
+
+    phase1_assembly(fase)
+
+    with st.expander("🔁 Como o Decoder gera a saída, token a token"):
+        phase1_decoding_panel()
 
-    q_val = st.slider("Valor do vetor Q (intensidade da consulta)", 1, 100, 60, step=1)
-    k_val = st.slider("Valor do vetor K (intensidade da chave)", 1, 100, 80, step=1)
-    d_k = st.slider("Dimensão dₖ (tamanho do vetor)", 1, 128, 64, step=1)
+    st.markdown(fase.md("alem"))
+
+    llm_sidebar_consultation()
+    report_bug_section()
+
+
+# --- Fase 2 ---
+from attention import naive_attention, naive_memory_bytes, tiled_attention, tiled_memory_bytes
+from charts import saturation_heatmaps_figure
+from softmax_saturation import SATURATION_THRESHOLD, SCALINGS, SEQ_LENGTHS, saturation_sweep
+
+ATTENTION_LAB_LENGTHS = [256, 1024, 4096, 8192, 16384, 32768]
+ATTENTION_NAIVE_LIMIT_BYTES = 256 * 2**20
+
+def phase2_attempt(fase):
+    # Cada ajuste de slider é uma tentativa; a resposta é a faixa atingida
+    estado = st.session_state
+    valor = estado.get("fase2_q", 60) * estado.get("fase2_k", 80) / estado.get("fase2_dk", 64) ** 0.5
+    faixa = "abaixo de 10" if valor < 10 else "acima de 30" if valor > 30 else "entre 10 e 30"
+    record_attempt(fase.id, faixa, faixa == "entre 10 e 30")
+
+@profiled_fragment
+def phase2_simulator(fase):
+    tentativa = {"on_change": phase2_attempt, "args": (fase,)}
+    q_val = st.slider("Valor do vetor Q (intensidade da consulta)", 1, 100, 60, step=1, key="fase2_q", **tentativa)
+    k_val = st.slider("Valor do vetor K (intensidade da chave)", 1, 100, 80, step=1, key="fase2_k", **tentativa)
+    d_k = st.slider("Dimensão dₖ (tamanho do vetor)", 1, 128, 64, step=1, key="fase2_dk", **tentativa)
 
     produto = q_val * k_val
     com_escalonamento = produto / (d_k ** 0.5)
@@ -222,355 +476,606 @@ A divisão por √dₖ evita que os valores da softmax se tornem extremos, prese
     if 10 <= com_escalonamento <= 30:
         st.success("✅ Excelente! O valor escalonado está em uma faixa ideal para o funcionamento do softmax.")
         st.info("📘 Dica: valores entre **10 e 30** mantêm a softmax balanceada e os gradientes úteis.")
-        if st.button("Avançar para Fase 3 ➡️", key="p2_advance_button"):
-            st.session_state.game_state = "phase3"
-            st.rerun()
+        if st.button(fase.advance_label, key="p2_advance_button"):
+            advance_to(fase.next)
     else:
         st.warning("⚠️ O valor escalonado ainda está fora do ideal. Tente ajustar Q, K ou dₖ para obter resultado entre **10 e 30**.")
 
-    st.markdown("""
-> 🔬 **Além do artigo**  
-> A dimensão dos vetores **Q e K** afeta a expressividade da atenção:  
-> - Vetores **pequenos** (ex: 16, 32) não capturam nuances complexas.  
-> - Vetores **grandes demais** (ex: 128, 256) causam produtos exagerados → saturação da softmax → aprendizado prejudicado.  
->  
-> A escalagem por √dₖ **compensa esse efeito**, mantendo os gradientes estáveis.  
->  
-> Na prática, isso é essencial em **modelos como GPT ou T5**, que processam sequências longas e dependem de uma atenção estável para manter coerência sem degradar o aprendizado em passos distantes.
-    """)
+@st.cache_data(max_entries=16)
+def saturation_results(d_k_max, samples):
+    # Uma varredura por grade (potências de 2 até d_k_max × SEQ_LENGTHS)
+    d_k = tuple(2 ** i for i in range(d_k_max.bit_length()))
+    return saturation_sweep(d_k, SEQ_LENGTHS, samples)
+
+@profiled_fragment
+def phase2_saturation_explorer():
+    st.markdown("Com Q e K aleatórios, veja o que acontece com a softmax de verdade quando dₖ cresce: entropia (1 = atenção espalhada, 0 = tudo numa chave só), maior probabilidade e o tamanho do Jacobiano, que é o que carrega o gradiente.")
+
+    col1, col2 = st.columns(2)
+    d_k_max = col1.select_slider("Maior dₖ", options=[64, 256, 1024, 4096], value=4096, key="fase2_sat_dk")
+    samples = col2.select_slider("Amostras por célula", options=[500, 1000, 2000, 5000], value=2000, key="fase2_sat_amostras")
+    metricas = {
+        "Entropia normalizada": ("entropy", (0, 1)),
+        "Maior probabilidade": ("max_prob", (0, 1)),
+        "‖Jacobiano‖ da softmax": ("jacobian_norm", (None, None)),
+    }
+    rotulo = st.radio("Métrica", list(metricas), horizontal=True, key="fase2_sat_metrica")
+    metric, (vmin, vmax) = metricas[rotulo]
+
+    resultado = saturation_results(d_k_max, samples)
+    with get_profiler().span("chart.saturation"):
+        grafico = get_chart_cache().get_or_render(
+            ("phase2_saturation", d_k_max, samples, metric),
+            lambda: figure_to_bytes(saturation_heatmaps_figure(
+                resultado[metric], resultado["d_k"], resultado["seq_lengths"], SCALINGS, rotulo, vmin, vmax
+            ))
+        )
+    st.image(grafico, use_container_width=True)
+
+    linha = list(resultado["seq_lengths"]).index(16)
+    sem, com = resultado["saturated"][:, linha, -1]
+    st.caption(
+        f"Com dₖ = {resultado['d_k'][-1]} e 16 chaves, {sem:.0%} das softmax sem escalonamento ficam saturadas"
+        f" (maior probabilidade > {SATURATION_THRESHOLD}); dividindo por √dₖ, {com:.0%}."
+    )
+
+@profiled_fragment
+def phase2_attention_lab():
+    st.markdown("Agora com matrizes de verdade: Q, K e V aleatórios, softmax estável e, opcionalmente, máscara causal. Compare o caminho ingênuo (matriz n×n inteira) com o caminho em blocos (softmax online).")
+
+    with st.form("fase2_lab_form"):
+        n = st.select_slider("Comprimento da sequência (n)", options=ATTENTION_LAB_LENGTHS, value=1024, key="fase2_lab_n")
+        d = st.select_slider("Dimensão dₖ", options=[16, 32, 64, 128], value=64, key="fase2_lab_d")
+        causal = st.checkbox("Máscara causal (cada token só vê os anteriores)", key="fase2_lab_causal")
+        executar = st.form_submit_button("Executar comparação ⚙️")
+
+    if not executar:
+        return
+
+    rng = np.random.default_rng(0)
+    Q, K, V = (rng.standard_normal((n, d), dtype=np.float32) for _ in range(3))
+    linhas = []
+
+    # Memória pela conta analítica: o tracemalloc é global ao processo e
+    # mediria junto as outras sessões (ver benchmarks/attention_bench.py)
+    naive_bytes = naive_memory_bytes(n, d, itemsize=4)
+    naive_mb = naive_bytes / 2**20
+    tiled_mb = tiled_memory_bytes(n, d, block_size=min(n, 512), itemsize=4) / 2**20
+
+    with st.spinner("Calculando atenção..."):
+        if naive_bytes <= ATTENTION_NAIVE_LIMIT_BYTES:
+            start = time.perf_counter()
+            naive_out = naive_attention(Q, K, V, causal=causal)
+            naive_s = time.perf_counter() - start
+            linhas.append(("Ingênuo O(n²)", f"{naive_s * 1000:.1f} ms", f"{naive_mb:,.1f} MB"))
+        else:
+            naive_out = None
+            linhas.append(("Ingênuo O(n²)", "não executado", f"{naive_mb:,.0f} MB"))
+
+        start = time.perf_counter()
+        tiled_out = tiled_attention(Q, K, V, causal=causal)
+        tiled_s = time.perf_counter() - start
+        linhas.append(("Em blocos O(n·d)", f"{tiled_s * 1000:.1f} ms", f"{tiled_mb:,.1f} MB"))
+
+    st.table({
+        "Caminho": [l[0] for l in linhas],
+        "Tempo": [l[1] for l in linhas],
+        "Memória de trabalho (estimada)": [l[2] for l in linhas],
+    })
+    if naive_out is not None:
+        st.caption(f"Diferença máxima entre os dois resultados: {np.abs(naive_out - tiled_out).max():.2e}")
+    else:
+        st.caption("A matriz n×n não caberia no limite de memória do laboratório — o caminho em blocos continua viável.")
 
-    llm_sidebar_consultation()
-    report_bug_section()
+def phase2_scaled_dot_product_attention(fase):
+    st.header(fase.title)
 
-# --- Fase 3 ---
-def phase3_multi_head_attention():
-    st.header("Fase 3: Multi-Head Attention: Cabeças Paralelas 🧠")
+    st.markdown(fase.md("conceito"))
 
-    st.markdown("""
-> 📘 **Conceito-chave do artigo**  
-> "Ao invés de uma única atenção com vetores de dimensão dₘₒdₑₗ, projetamos Q, K, V múltiplas vezes (h cabeças) para subespaços menores, permitindo que o modelo atenda simultaneamente a diferentes informações de diferentes posições."  
-> — *Vaswani et al., 2017*
+    with st.expander("🤔 O que são Q, K e dₖ?"):
+        st.markdown(fase.md("qk"))
+        st.markdown("A fórmula da atenção é:")
+        st.latex(r"Attention(Q, K, V) = \text{softmax}\left(\frac{QK^T}{\sqrt{d_k}}\right)V")
 
-A Multi-Head Attention permite que o Transformer olhe para a mesma informação de diversas maneiras simultaneamente, aprendendo padrões variados entre tokens.
-    """)
+    phase2_simulator(fase)
 
-    frase = ["O", "modelo", "aprende", "relações", "entre", "tokens"]
-    st.write("Escolha uma palavra para observar como diferentes cabeças podem reagir a ela:")
+    st.subheader("🌡️ Saturação da softmax: por que dividir por √dₖ?")
+    phase2_saturation_explorer()
 
-    foco = st.selectbox("Palavra de foco (query)", frase, key="p3_query")
+    st.subheader("🧪 Laboratório: atenção em sequências longas")
+    phase2_attention_lab()
 
-    padroes_cabeca1 = {
-        "O": ["modelo"],
-        "modelo": ["O", "aprende"],
-        "aprende": ["modelo"],
-        "relações": ["entre"],
-        "entre": ["relações"],
-        "tokens": ["entre"]
-    }
+    st.markdown(fase.md("alem"))
 
-    padroes_cabeca2 = {
-        "O": ["aprende"],
-        "modelo": ["relações"],
-        "aprende": ["tokens"],
-        "relações": ["modelo"],
-        "entre": ["aprende"],
-        "tokens": ["O"]
-    }
+    llm_sidebar_consultation()
+    report_bug_section()
 
-    padroes_cabeca3 = {
-        "O": ["O"],
-        "modelo": ["tokens"],
-        "aprende": ["relações"],
-        "relações": ["tokens"],
-        "entre": ["modelo"],
-        "tokens": ["relações"]
-    }
+# --- Cache de gráficos ---
+from charts import ChartCache
 
-    st.markdown("🔎 **Cabeça 1** (posição local): tende a olhar para palavras vizinhas.")
-    st.markdown("🔎 **Cabeça 2** (ligação estrutural): conecta palavras com dependência gramatical.")
-    st.markdown("🔎 **Cabeça 3** (semântica implícita): foca em termos semanticamente relacionados.")
+@st.cache_resource
+def get_chart_cache():
+    # Bytes PNG compartilhados entre sessões, com descarte LRU
+    return ChartCache()
 
-    st.markdown("---")
-    st.markdown(f"🧠 Com foco em **{foco}**, veja como cada cabeça pode responder:")
+# --- Fase 3 ---
+from charts import attention_heatmaps_figure, figure_to_bytes
+from multihead import MAX_HEADS, attention_weights, load_embedding_table, tokenize
+
+FRASE_PADRAO = "O modelo aprende relações entre tokens"
+P3_MAX_TOKENS = 512
+P3_HEADS_PER_PAGE = 12
+
+@st.cache_resource
+def get_embedding_table():
+    # Tabela compacta (.npy em assets/) aberta uma vez por processo via mmap
+    return load_embedding_table()
+
+@st.cache_resource(max_entries=4)
+def phase3_attention_weights(tokens, n_cabecas):
+    # Todas as cabeças num único einsum: pesos com forma [h, seq, seq].
+    # Compartilhado e sem cópia por rerun (até ~100 MB com 512 tokens × 96
+    # cabeças), por isso poucas entradas e somente leitura.
+    pesos = attention_weights(get_embedding_table(), list(tokens), n_cabecas)
+    pesos.flags.writeable = False
+    return pesos
+
+@profiled_fragment
+def phase3_heads(fase):
+    frase = st.text_input("Digite uma frase (até centenas de tokens):", value=FRASE_PADRAO, key="p3_frase")
+    n_cabecas = st.slider("Número de cabeças (h)", 1, MAX_HEADS, 8, key="p3_cabecas")
+
+    tokens = tokenize(frase) or tokenize(FRASE_PADRAO)
+    if len(tokens) > P3_MAX_TOKENS:
+        st.warning(f"⚠️ A frase foi cortada nos primeiros {P3_MAX_TOKENS} tokens.")
+        tokens = tokens[:P3_MAX_TOKENS]
+
+    # Trocar o foco ou a página só relê os pesos já calculados
+    pesos = phase3_attention_weights(tuple(tokens), n_cabecas)
 
-    st.write(f"**Cabeça 1:** Atenção distribuída para: {', '.join(padroes_cabeca1.get(foco, []))}")
-    st.write(f"**Cabeça 2:** Atenção distribuída para: {', '.join(padroes_cabeca2.get(foco, []))}")
-    st.write(f"**Cabeça 3:** Atenção distribuída para: {', '.join(padroes_cabeca3.get(foco, []))}")
+    st.write("Escolha uma palavra para observar como diferentes cabeças podem reagir a ela:")
+    foco = st.selectbox(
+        "Palavra de foco (query)", range(len(tokens)),
+        format_func=lambda i: f"{i + 1}. {tokens[i]}", key="p3_query"
+    )
+    if foco is None or foco >= len(tokens):
+        foco = 0
+
+    st.markdown("🔎 Cada cabeça tem suas próprias projeções de Q e K: algumas ficam mais **posicionais** (olham para vizinhas), outras reagem ao **conteúdo** dos tokens.")
+
+    st.markdown("---")
+    st.markdown(f"🧠 Com foco em **{tokens[foco]}**, veja para onde cada cabeça olha mais:")
+
+    paginas = max(1, -(-n_cabecas // P3_HEADS_PER_PAGE))
+    pagina = st.slider("Página de cabeças", 1, paginas, 1, key="p3_pagina") if paginas > 1 else 1
+    inicio = (pagina - 1) * P3_HEADS_PER_PAGE
+    fim = min(inicio + P3_HEADS_PER_PAGE, n_cabecas)
+
+    linha_foco = pesos[inicio:fim, foco, :]
+    mais_atendido = linha_foco.argmax(axis=-1)
+    st.table({
+        "Cabeça": [f"Cabeça {h + 1}" for h in range(inicio, fim)],
+        "Atenção distribuída para": [tokens[t] for t in mais_atendido],
+        "Peso": [f"{linha_foco[i, t]:.0%}" for i, t in enumerate(mais_atendido)],
+    })
+
+    with get_profiler().span("chart.heatmaps"):
+        grafico = get_chart_cache().get_or_render(
+            ("phase3_heatmaps", tuple(tokens), n_cabecas, pagina),
+            lambda: figure_to_bytes(attention_heatmaps_figure(pesos[inicio:fim], tokens, inicio))
+        )
+    st.image(grafico, use_container_width=True)
 
     st.success("✅ Observe como diferentes cabeças focam em padrões distintos — essa diversidade é essencial para que o modelo compreenda múltiplas relações contextuais ao mesmo tempo.")
 
-    if st.button("Avançar para Fase 4 ➡️", key="p3_advance_button"):
-        st.session_state.game_state = "phase4"
-        st.rerun()
+    if st.button(fase.advance_label, key="p3_advance_button"):
+        advance_to(fase.next)
+
+def phase3_multi_head_attention(fase):
+    st.header(fase.title)
+
+    st.markdown(fase.md("conceito"))
+
+    phase3_heads(fase)
 
-    st.markdown("""
-> 🔬 **Além do artigo**  
-> Em modelos maiores como **GPT-3 ou PaLM**, o número de cabeças cresce (ex: 96 ou mais).  
-> Cada uma aprende de forma independente:  
-> - Algumas especializam-se em pontuação, outras em coesão, ou em longas dependências sintáticas.  
-> - A diversidade entre cabeças é essencial para tarefas como sumarização, programação, tradução ou raciocínio matemático.  
->  
-> Mesmo cabeças com desempenho fraco isoladamente podem ser úteis dentro do conjunto.
-    """)
+    st.markdown(fase.md("alem"))
 
     llm_sidebar_consultation()
     report_bug_section()
 
-# --- Fase 4 ---
-import numpy as np
-import matplotlib.pyplot as plt
+# --- Quiz de múltipla escolha ---
+def quiz_attempt(fase, key):
+    resposta = st.session_state[key]
+    record_attempt(fase.id, resposta, resposta == fase.data["quiz"]["answer"])
 
-def phase4_positional_encoding():
-    st.header("Fase 4: Codificação Posicional (Positional Encoding) 🌐")
+@profiled_fragment
+def radio_quiz(fase, key, button_key):
+    # Pergunta, opções e mensagens vêm do content pack (fase.data["quiz"])
+    quiz = fase.data["quiz"]
+    resposta = st.radio(
+        quiz["question"], quiz["options"], index=0, key=key,
+        on_change=quiz_attempt, args=(fase, key),
+    )
 
-    st.markdown("""
-> 📘 **Conceito-chave do artigo**  
-> “Como o modelo não possui mecanismos recorrentes ou convolucionais, é necessário incorporar alguma informação sobre a ordem das palavras na sequência. Para isso, usamos funções senoidais que variam com a posição.”  
-> — *Vaswani et al., 2017*
+    if resposta:
+        if resposta == quiz["answer"]:
+            st.success(quiz["success"])
+            if st.button(fase.advance_label, key=button_key):
+                advance_to(fase.next)
+        else:
+            aviso = st.warning if quiz.get("error_style") == "warning" else st.error
+            aviso(quiz["error"].format(escolha=resposta))
 
-Transformers não têm noção da ordem dos tokens por padrão. Para isso, adicionam aos embeddings vetores de **codificação posicional** — combinações de seno e cosseno — que representam a posição de cada palavra na sequência.
+def quiz_phase(fase):
+    # View genérica: fases novas só com texto + quiz não precisam de código
+    st.header(fase.title)
+    st.markdown(fase.md("conceito"))
+    radio_quiz(fase, key=f"{fase.id}_quiz", button_key=f"{fase.id}_advance_button")
+    st.markdown(fase.md("alem"))
 
-Essas funções produzem padrões contínuos e diferenciáveis, permitindo que o modelo:
-- Reconheça a **posição absoluta** dos tokens
-- Codifique **relações de distância** entre palavras
-- **Extrapole** para comprimentos de sequência maiores que os vistos no treino
-""")
+    llm_sidebar_consultation()
+    report_bug_section()
 
-    st.subheader("🔢 Visualização: Senoides para representar posições")
+# --- Fase 4 ---
+from charts import positional_encoding_figure, render_chart
+
+PE_PLOT_POINTS = 1000
+
+@profiled_fragment
+def phase4_chart():
+    comprimento = st.select_slider(
+        "Comprimento da sequência (posições)",
+        options=[50, 100, 500, 1_000, 5_000, 10_000, 50_000, 100_000, 1_000_000],
+        value=50, key="fase4_comprimento"
+    )
+    dim = st.select_slider(
+        "Dimensão do modelo (dₘₒdₑₗ)", options=[16, 32, 64, 128, 256, 512, 1024],
+        value=16, key="fase4_dim"
+    )
+    dim_destaque = st.slider(
+        "Dimensão destacada (mais alta → frequência mais baixa)", 2, dim - 2, min(dim // 2, dim - 2),
+        step=2, key="fase4_dim_destaque"
+    )
+
+    with get_profiler().span("chart.positional_encoding"):
+        grafico = render_chart(
+            get_chart_cache(), positional_encoding_figure, comprimento, dim, dim_destaque, PE_PLOT_POINTS
+        )
+    st.image(grafico, use_container_width=True)
+
+def phase4_positional_encoding(fase):
+    st.header(fase.title)
+
+    st.markdown(fase.md("conceito"))
 
-    posicoes = np.arange(0, 50)
-    dim = 16  # Exemplo com 16 dimensões
-    pos_enc = np.array([
-        [np.sin(p / (10000 ** (2 * i / dim))) if i % 2 == 0 else np.cos(p / (10000 ** (2 * (i - 1) / dim))) for i in range(dim)]
-        for p in posicoes
-    ])
+    st.subheader("🔢 Visualização: Senoides para representar posições")
 
-    fig, ax = plt.subplots(figsize=(8, 3))
-    ax.plot(posicoes, pos_enc[:, 0], label="Dimensão 0 (seno)")
-    ax.plot(posicoes, pos_enc[:, 1], label="Dimensão 1 (cosseno)")
-    ax.set_title("Variação senoidal em duas dimensões do Positional Encoding")
-    ax.set_xlabel("Posição do token")
-    ax.legend()
-    st.pyplot(fig)
+    phase4_chart()
 
-    st.markdown("Acima, vemos como diferentes dimensões oscilam de forma distinta conforme a posição muda. Isso cria um **padrão único** por posição, que pode ser aprendido pelo modelo.")
+    st.markdown(fase.md("grafico"))
 
     st.subheader("🧠 Pergunta")
-    resposta = st.radio("O que o Positional Encoding permite ao Transformer?", [
-        "Capturar a importância semântica das palavras",
-        "Aprender a ordem e a distância entre os tokens",
-        "Entender a frequência de cada palavra",
-        "Ignorar a posição, já que a atenção cuida disso"
-    ], index=0, key="fase4_radio")
-
-    if resposta:
-        if resposta == "Aprender a ordem e a distância entre os tokens":
-            st.success("✅ Correto! O Positional Encoding insere padrões que permitem ao modelo saber quem vem antes ou depois, e quão longe cada palavra está da outra.")
-            if st.button("Avançar para Fase 5 ➡️", key="p4_advance_button"):
-                st.session_state.game_state = "phase5"
-                st.rerun()
-        else:
-            st.error("❌ Ainda não! Lembre-se: o objetivo do Positional Encoding é oferecer ao modelo uma forma de representar a **ordem e distância** entre tokens — algo que, sozinho, a atenção não captura.")
+    radio_quiz(fase, key="fase4_radio", button_key="p4_advance_button")
 
-    st.markdown("""
-> 🔬 **Além do artigo**  
-> Muitos modelos modernos (como BERT e GPT) usam variantes de codificação posicional:  
-> - **Fixas** (como seno/cosseno) → extrapolam para posições além do treino  
-> - **Aprendidas** → mais flexíveis, mas menos interpretáveis  
->  
-> A codificação posicional continua sendo uma das maiores inovações dos Transformers — e uma das razões para sua escalabilidade.
-    """)
+    st.markdown(fase.md("alem"))
 
     llm_sidebar_consultation()
     report_bug_section()
 
 
 # --- Fase 5 ---
-def phase5_training_results():
-    st.header("Fase 5: Treinamento e Otimização (Resultados e Eficiência) ⚡")
+from concurrent.futures import ThreadPoolExecutor
+
+from training_sim import start_training
+from transformer_costs import paper_comparison, sweep
+
+TRAINING_STEPS = 300
+TRAINING_POLL_SECONDS = 0.3
+COST_CURVE_LAYERS = [2, 6, 12, 24, 48]
+
+@st.cache_resource
+def get_training_executor():
+    # Treinos de todas as sessões dividem poucas threads
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="training")
+
+def phase5_training_progress():
+    # Treino real (NumPy) roda uma vez por sessão numa thread; aqui só
+    # lemos o progresso publicado por ela, no máximo a cada TRAINING_POLL_SECONDS.
+    game = current_game()
+    training_run = game.training
+    step, loss, accuracy, history = training_run.snapshot()
+
+    if training_run.error is not None:
+        st.error("❌ Ocorreu um erro ao simular o treinamento.")
+        return
+
+    st.progress(step / training_run.steps, text=f"Passo {step}/{training_run.steps}")
+    if history:
+        st.line_chart({"Perda (loss)": [h[1] for h in history]}, height=160)
+        st.caption(f"Perda: {loss:.4f} · Acurácia na tarefa de copiar o token anterior: {accuracy:.0%}")
+
+    if training_run.done:
+        st.success("✅ Treinamento Concluído! Seu Transformer está pronto!")
+        if game.training_polling:
+            game.training_polling = False
+            st.rerun()
+    else:
+        game.training_polling = True
+
+@st.cache_data(max_entries=32)
+def cost_sweep(d_model_range, seq_len, batch, d_model_step=64):
+    # Uma varredura por faixa: todas as configurações numa só conta NumPy
+    d_models = np.arange(d_model_range[0], d_model_range[1] + 1, d_model_step)
+    costs = sweep(COST_CURVE_LAYERS, d_models, 8, 4, seq_len, batch)
+    shape = (len(COST_CURVE_LAYERS), len(d_models))
+    curves = {}
+    for metric in ("params", "train_flops", "activation_bytes", "kv_cache_bytes"):
+        values = costs[metric].reshape(shape)
+        curves[metric] = {"d_model": d_models}
+        curves[metric].update({f"N={n}": values[i] for i, n in enumerate(COST_CURVE_LAYERS)})
+    return curves
+
+@profiled_fragment
+def phase5_cost_calculator():
+    with st.form("fase5_calc_form"):
+        d_model_range = st.slider(
+            "Faixa de dₘₒdₑₗ", 128, 8192, (256, 4096), step=64, key="fase5_calc_dmodel"
+        )
+        col1, col2 = st.columns(2)
+        seq_len = col1.select_slider(
+            "Comprimento da sequência", options=[128, 256, 512, 1024, 2048, 4096, 8192],
+            value=512, key="fase5_calc_seq"
+        )
+        batch = col2.select_slider(
+            "Tamanho do lote", options=[1, 4, 16, 64, 256], value=16, key="fase5_calc_batch"
+        )
+        st.form_submit_button("Calcular curvas 📈")
+
+    curves = cost_sweep(d_model_range, seq_len, batch)
+    metricas = {
+        "Parâmetros (milhões)": ("params", 1e-6),
+        "FLOPs de treino (5·10⁹ tokens, ×10¹⁸)": ("train_flops", 1e-18),
+        "Memória de ativações (GB, fp16)": ("activation_bytes", 2 ** -30),
+        "KV-cache na inferência (GB, fp16)": ("kv_cache_bytes", 2 ** -30),
+    }
+    rotulo = st.radio("Métrica", list(metricas), horizontal=True, key="fase5_calc_metrica")
+    metric, escala = metricas[rotulo]
+    tabela = {nome: valores * escala if nome != "d_model" else valores for nome, valores in curves[metric].items()}
+    st.line_chart(tabela, x="d_model", height=260)
+    st.caption("Cada curva é uma profundidade N (camadas no encoder e no decoder), com h=8 e d_ff = 4·dₘₒdₑₗ.")
+
+    st.table([
+        {
+            "Modelo": row["model"],
+            "Parâmetros (calculado)": f"{row['params'] / 1e6:.0f}M",
+            "Parâmetros (artigo)": f"{row['paper_params'] / 1e6:.0f}M",
+            "FLOPs de treino (calculado)": f"{row['train_flops']:.1e}",
+            "FLOPs de treino (artigo)": f"{row['paper_train_flops']:.1e}",
+        }
+        for row in paper_comparison()
+    ])
+    st.caption("O artigo estimou FLOPs por horas de GPU × capacidade da P100; a conta 3 × forward por token dá a mesma ordem de grandeza.")
 
-    st.markdown("""
-> 📘 **Conceito-chave do artigo**  
-> "O modelo Transformer atinge resultados de ponta em tradução automática, com menor custo computacional de treinamento comparado a modelos anteriores."  
-> — *Vaswani et al., 2017*
+def phase5_training_results(fase):
+    st.header(fase.title)
 
-A arquitetura baseada em atenção pura permite paralelismo eficiente e melhora a escalabilidade, reduzindo o tempo e custo de treinamento mesmo com grande volume de dados.
-    """)
+    st.markdown(fase.md("conceito"))
 
     st.subheader("Simulando Treinamento... ⏳")
-    progress_bar = st.progress(0)
-    for i in range(100):
-        time.sleep(0.01)
-        progress_bar.progress(i + 1)
-    st.success("✅ Treinamento Concluído! Seu Transformer está pronto!")
-
-    st.write("Aqui estão os resultados comparativos do Transformer em tarefas de tradução (WMT 2014 EN-DE):")
-
-    st.markdown("""
-**Legenda:**
-- 🟢 BLEU Score: quanto mais alto, melhor
-- 🔵 FLOPs (Floating Point Operations): quanto menor, mais eficiente
-    """)
-
-    data = {
-        "Modelo": ["ByteNet", "GNMT + RL", "ConvS2S", "Transformer (base)", "Transformer (big)"],
-        "BLEU (EN-DE)": ["23.75", "24.6", "25.16", "**27.3** 🟢", "**28.4** 🟢"],
-        "Custo de Treinamento (FLOPs)": ["$2.3\\cdot10^{19}$", "$1.4\\cdot10^{21}$", "$9.6\\cdot10^{18}$", "**$3.3\\cdot10^{18}$** 🔵", "**$2.3\\cdot10^{19}$**"]
-    }
-    st.table(data)
+    game = current_game()
+    if game.training is None:
+        game.training = start_training(get_training_executor(), steps=TRAINING_STEPS)
+    training_run = game.training
+    profiled_fragment(phase5_training_progress, run_every=None if training_run.done else TRAINING_POLL_SECONDS)()
 
-    st.subheader("🔍 Qual modelo você considera o melhor?")
+    st.write(fase.md("resultados"))
 
-    escolha = st.radio("Clique em um modelo para destacá-lo:", options=[
-        "ByteNet", "GNMT + RL", "ConvS2S", "Transformer (base)", "Transformer (big)"
-    ], key="fase5_escolha")
+    st.markdown(fase.md("legenda"))
 
-    if escolha:
-        if escolha == "Transformer (big)":
-            st.success("🏆 Exatamente! O **Transformer (big)** se destacou em desempenho (BLEU 28.4) com ótimo custo-benefício.")
-            if st.button("Ver Resumo Final 🏆", key="p5_summary_button"):
-                st.session_state.game_state = "summary"
-                st.rerun()
-        else:
-            st.warning(f"⚠️ O modelo **{escolha}** teve resultados razoáveis, mas não foi o melhor no balanço entre BLEU e FLOPs. Tente observar novamente a tabela!")
+    st.table(dict(fase.data["table"]))
+
+    with st.expander("📈 Calculadora de custo: parâmetros, FLOPs e memória"):
+        phase5_cost_calculator()
+
+    st.subheader("🔍 Qual modelo você considera o melhor?")
+
+    radio_quiz(fase, key="fase5_escolha", button_key="p5_summary_button")
 
-    st.markdown("""
-> 🔬 **Além do artigo**  
-> O BLEU Score é uma métrica baseada em n-gramas que compara a saída gerada com traduções humanas.  
-> - Um aumento de **2 BLEU** pode representar uma diferença **perceptível na fluência e precisão**.  
-> - O Transformer não só superou modelos anteriores, mas o fez com muito **menos custo de FLOPs**.  
->  
-> Isso abriu caminho para aplicações em tempo real, como tradução simultânea, assistentes virtuais multilíngues e até geração de código (com adaptações).
-    """)
+    st.markdown(fase.md("alem"))
 
     llm_sidebar_consultation()
     report_bug_section()
 
 
 # --- Resumo Final + LLM ---
-def game_summary():
-    st.header("Missão Concluída! Recapitulação do artigo 'Attention Is All You Need' 🎉")
+def game_summary(fase):
+    st.header(fase.title)
 
     # 🔽 Exibe imagem final centralizada
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        st.image("img/imagem_final.jpg", use_container_width=True)
+        st.image(image_source("imagem_final.jpg", CENTER_COLUMN_WIDTH), use_container_width=True)
     st.markdown("---")
 
-    st.subheader("🧠 Você demonstrou uma compreensão sólida dos fundamentos do Transformer!")
-
-    st.markdown("""
-> 📘 **Conceito central do artigo**  
-> "A arquitetura Transformer depende exclusivamente de mecanismos de atenção, eliminando o uso de recorrência e convolução, permitindo paralelização eficiente."  
-> — *Vaswani et al., 2017*
-    """)
-
-    st.markdown("### 🧩 Elementos centrais explorados no jogo")
-
-    st.markdown("""
-#### 1. **Arquitetura Encoder-Decoder baseada em atenção**
-- O modelo é organizado em **camadas empilhadas** de codificadores e decodificadores.
-- O **Encoder** transforma a entrada em uma representação contextual.
-- O **Decoder** gera a saída com base nessa representação e nas posições anteriores.
-- Isso permite lidar com **tarefas de tradução**, sumarização e outras sequenciais com alta flexibilidade.
-""")
-
-    st.markdown("""
-#### 2. **Mecanismo de Atenção por Produto Escalar Escalonado**
-- A atenção compara a *query* com todas as *keys* e pondera os *values*.
-- O produto Q·K é **escalonado por √dₖ**, evitando saturação da função softmax.
-- Isso mantém os **gradientes úteis** e o **treinamento estável**, mesmo em modelos grandes.
-""")
-
-    st.markdown("""
-#### 3. **Atenção Multi-Cabeça (Multi-Head Attention)**
-- Em vez de uma única atenção, o modelo usa múltiplas cabeças independentes.
-- Cada cabeça aprende um padrão diferente: **estrutura, semântica, posição, dependências**.
-- No final, os resultados são **concatenados** e projetados novamente, enriquecendo a representação.
-""")
-
-    st.markdown("""
-#### 4. **Positional Encoding**
-- Como o Transformer **não possui recorrência**, ele precisa saber a posição das palavras.
-- Usando **funções seno e cosseno**, cada posição recebe uma curva única, contínua e extrapolável.
-- Isso permite ao modelo lidar com **ordem das palavras** mesmo em contextos longos ou fora da distribuição.
-""")
-
-    st.markdown("""
-#### 5. **Eficiência de Treinamento e Resultados**
-- O Transformer atinge **BLEU scores superiores** a modelos anteriores com **menos FLOPs**.
-- A ausência de recorrência permite **paralelização total** no treinamento.
-- Sua eficiência abriu caminho para modelos massivos como BERT, GPT, T5, e muitos outros.
-""")
-
-    st.markdown("### 🌍 Impactos no mundo real")
-    st.markdown("""
-- Permitiu o surgimento de modelos de linguagem de código aberto e escaláveis.
-- Influenciou modelos em **áudio, visão computacional, bioinformática e robótica**.
-- Tornou possível o treinamento em **paralelo em GPUs e TPUs**, reduzindo drasticamente o tempo de inferência.
-
-> 🔬 O Transformer mudou profundamente o paradigma de modelagem de linguagem — e sua missão hoje mostra que você compreende as engrenagens por trás dessa revolução.
-    """)
-
-    if st.button("Jogar novamente 🔁", key="summary_replay_button"):
-        for key in list(st.session_state.keys()):
-            del st.session_state[key]
+    st.subheader(fase.data.get("subtitle", ""))
+
+    # Blocos do resumo na ordem em que aparecem no content pack
+    for bloco in fase.markdown.values():
+        st.markdown(bloco)
+
+    if st.button(fase.advance_label, key="summary_replay_button"):
+        current_game().reset(get_content_store().current().start)
+        evict_widget_state()
         st.rerun()
 
     llm_sidebar_consultation()
     report_bug_section()
 
 # --- Menu Inicial ---
-def main_menu():
-    st.title("🚀 A Jornada do Transformer: Atenção Desvendada! 🚀")
-
-    st.write("""
-Esse é um jogo interativo pensado para ajudar você a revisar, de forma leve e engajada, os principais conceitos do paper clássico *Attention is All You Need*. [Leia o paper original](https://arxiv.org/abs/1706.03762).
+def main_menu(fase):
+    st.title(fase.title)
 
-Durante o jogo, você será guiado por cinco fases, cada uma com um mini-desafio sobre aspectos fundamentais do Transformer: arquitetura, atenção escalonada, atenção multi-cabeça, codificação posicional e resultados de desempenho.
-
-No canto lateral esquerdo, você pode:
-- ❓ Consultar uma **LLM integrada** sempre que tiver dúvidas sobre os conceitos apresentados.
-- 🐞 Usar a **caixinha de feedback** para reportar erros conceituais ou sugerir melhorias a qualquer momento.
-    """)
+    st.write(fase.md("intro"))
 
     # 🔽 Centralizar imagem com layout de colunas
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        st.image("img/transformer.png", use_container_width=True)
+        st.image(image_source("transformer.png", CENTER_COLUMN_WIDTH), use_container_width=True)
 
-    if st.button("Iniciar Missão ➡️"):
-        st.session_state.game_state = "phase1"
-        st.rerun()
+    if st.button(fase.advance_label):
+        advance_to(fase.next)
         
     # 🔽 Mostra a imagem no sidebar da página inicial
     sidebar_inicial()
     report_bug_section()
 
+# --- Estatísticas (telemetria) ---
+def telemetry_stats_view():
+    # Aberta com ?view=stats&token=…; lê apenas as tabelas agregadas
+    st.title("📊 Estatísticas do jogo")
+    telemetria = get_telemetry()
+    store = telemetria.store
+    registry = get_content_store().current()
+
+    def nome(phase_id):
+        fase = registry.phase(phase_id)
+        return fase.label if fase else phase_id
+
+    ordem = {phase_id: i for i, phase_id in enumerate(registry.phases)}
+    st.subheader("Progresso por fase")
+    st.table([
+        {
+            "Fase": nome(row["phase"]),
+            "Entradas": row["entered"],
+            "Concluídas": row["completed"],
+            "Conclusão": f"{row['completion_rate']:.0%}",
+            "Tempo médio": f"{row['avg_seconds']:.0f} s",
+            "Tentativas": row["attempts"],
+            "Tentativas por conclusão": f"{row['attempts_per_completion']:.1f}",
+            "Acertos": f"{row['correct_rate']:.0%}",
+        }
+        for row in sorted(store.phase_stats(), key=lambda r: ordem.get(r["phase"], len(ordem)))
+    ])
+
+    st.subheader("Respostas erradas mais comuns")
+    st.table([
+        {"Fase": nome(phase), "Resposta": answer, "Vezes": count}
+        for phase, answer, count in store.top_wrong_answers()
+    ])
+
+    st.subheader("Uso da LLM")
+    rotulos = {LLM_REQUEST: "Pedido", LLM_RESULT: "Resultado"}
+    st.table([
+        {"Tipo": rotulos.get(row["kind"], row["kind"]), "Origem": row["source"],
+         "Quantidade": row["count"], "Tempo médio": f"{row['avg_seconds']:.2f} s"}
+        for row in store.llm_stats()
+    ])
+    cache = get_llm_cache().stats()
+    executor = get_llm_executor().metrics()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Cache: acertos", f"{cache['hit_rate']:.0%}", help=f"{cache['hits']} acertos, {cache['misses']} faltas")
+    col2.metric("Cache: respostas guardadas", cache["entries"])
+    col3.metric("Pool: rodando / na fila", f"{executor['running']} / {executor['queued']}")
+    col4.metric("Pool: recusados (fila cheia)", executor["rejected"])
+    st.caption(
+        f"Eventos gravados neste processo: {telemetria.written} · na fila: {telemetria.pending()}"
+        f" · descartados: {telemetria.dropped} · falhas de escrita: {telemetria.errors}"
+    )
+
+def feedback_log_view():
+    # Aberta com ?view=feedback&token=…; consulta o log pelo índice, uma página por vez
+    st.title("🗂️ Feedbacks recebidos")
+    log = get_feedback_log()
+    novos = log.sync()
+
+    col_datas, col_busca, col_por_pagina = st.columns([2, 2, 1])
+    with col_datas:
+        periodo = st.date_input("Período", value=(), key="feedback_periodo")
+    with col_busca:
+        busca = st.text_input("Buscar no texto", key="feedback_busca")
+    with col_por_pagina:
+        por_pagina = st.selectbox("Por página", [10, 20, 50, 100], index=1, key="feedback_por_pagina")
+    inicio = periodo[0] if len(periodo) > 0 else None
+    fim = periodo[1] if len(periodo) > 1 else inicio
+
+    resultado = log.query(
+        inicio, fim, busca, page=st.session_state.get("feedback_pagina", 1), per_page=por_pagina, sync=False
+    )
+
+    if resultado.entries:
+        st.table([
+            {"Data": entry.timestamp or "—", "Feedback": entry.text, "Arquivo": entry.segment}
+            for entry in resultado.entries
+        ])
+    else:
+        st.info("Nenhum feedback encontrado com esses filtros.")
+
+    # Filtros novos podem reduzir o número de páginas; o seletor acompanha
+    st.session_state.feedback_pagina = resultado.page
+    st.number_input("Página", min_value=1, max_value=resultado.pages, key="feedback_pagina")
+
+    stats = log.stats()
+    st.caption(
+        f"Página {resultado.page} de {resultado.pages} · {resultado.total} resultado(s)"
+        f" · {stats['entries']} feedbacks em {stats['segments']} segmento(s)"
+        f" · {novos} novo(s) indexado(s) agora"
+    )
+    sink = get_feedback_sink()
+    if isinstance(sink.backend, GithubBackend):
+        origem = (f"Backend principal: GitHub ({sink.backend.repo_name}/{sink.backend.file_path});"
+                  f" esta tela lê a cópia local em {LOCAL_FEEDBACK_PATH}, escrita por este processo")
+    else:
+        origem = f"Backend: arquivo local {LOCAL_FEEDBACK_PATH}"
+    st.caption(
+        f"{origem} · na fila: {sink.pending()} · falhas de escrita: {sink.errors} · descartados: {sink.dropped}"
+    )
+
 # --- Navegação ---
-fases_nomes = {
-    "menu": "Menu Inicial",
-    "phase1": "Fase 1",
-    "phase2": "Fase 2",
-    "phase3": "Fase 3",
-    "phase4": "Fase 4",
-    "phase5": "Fase 5",
-    "summary": "Resumo Final"
+# Views que um content pack pode usar; cada fase do pack aponta para uma delas
+PHASE_VIEWS = {
+    "menu": main_menu,
+    "architecture": phase1_architecture,
+    "attention": phase2_scaled_dot_product_attention,
+    "multi_head": phase3_multi_head_attention,
+    "positional": phase4_positional_encoding,
+    "results": phase5_training_results,
+    "summary": game_summary,
+    "quiz": quiz_phase,
+}
+
+# Telas de administração, abertas por ?view=<nome>&token=<ADMIN_TOKEN>.
+# Sem o segredo configurado (ou com token errado) a URL cai no jogo normal.
+ADMIN_VIEWS = {
+    "stats": telemetry_stats_view,
+    "feedback": feedback_log_view,
 }
-estado_legivel = fases_nomes.get(st.session_state.game_state, "Desconhecido")
-st.write(f"🧭 Estado atual: {estado_legivel}")
-
-if st.session_state.game_state == "menu":
-    main_menu()
-elif st.session_state.game_state == "phase1":
-    phase1_architecture()
-elif st.session_state.game_state == "phase2":
-    phase2_scaled_dot_product_attention()
-elif st.session_state.game_state == "phase3":
-    phase3_multi_head_attention()
-elif st.session_state.game_state == "phase4":
-    phase4_positional_encoding()
-elif st.session_state.game_state == "phase5":
-    phase5_training_results()
-elif st.session_state.game_state == "summary":
-    game_summary()
+
+def is_admin():
+    try:
+        expected = st.secrets["ADMIN_TOKEN"]
+    except Exception:
+        return False
+    token = st.query_params.get("token", "")
+    return bool(expected) and hmac.compare_digest(token.encode(), str(expected).encode())
+
+registry = get_content_store().current()
+profiler = get_profiler()
+vista = st.query_params.get("view")
+admin_view = ADMIN_VIEWS.get(vista) if vista in ADMIN_VIEWS and is_admin() else None
+
+with profiler.span("init_state"):
+    init_state(registry)
+
+with profiler.rerun(vista if admin_view else current_game().phase):
+
+    if admin_view is not None:
+        admin_view()
+    else:
+        fase_atual = registry.phase(current_game().phase)
+        estado_legivel = fase_atual.label if fase_atual else "Desconhecido"
+        st.write(f"🧭 Estado atual: {estado_legivel}")
+
+        if fase_atual is not None:
+            enter_phase(fase_atual.id)
+            with profiler.span(f"view.{fase_atual.view}"):
+                PHASE_VIEWS[fase_atual.view](fase_atual)